@@ -1,4 +1,9 @@
 from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
 
 from airport.models import (
     Airport,
@@ -7,11 +12,46 @@ from airport.models import (
     AirplaneType,
     Airplane,
     Flight,
+    FlightCrew,
     Order,
     Ticket,
 )
 
 
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator taking the row count of unfiltered large tables from the
+    PostgreSQL planner statistics (pg_class.reltuples) instead of COUNT(*).
+
+    Filtered changelists and tables under `min_estimate` rows are still
+    counted exactly.
+    """
+
+    min_estimate = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= self.min_estimate:
+                return int(row[0])
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings of tables too large to count or filter by value."""
+
+    paginator = EstimatedCountPaginator
+    # Skip the second COUNT(*) of the whole table on filtered changelists.
+    show_full_result_count = False
+
+
 @admin.register(Airport)
 class AirportAdmin(admin.ModelAdmin):
     list_display = ("name", "closest_big_city")
@@ -25,8 +65,13 @@ class RouteAdmin(admin.ModelAdmin):
     list_display = ("source", "destination", "distance")
     search_fields = ("source__name", "destination__name", "distance")
     list_filter = ("source", "destination")
+    autocomplete_fields = ("source", "destination")
     ordering = ("source",)
 
+    def get_queryset(self, request):
+        # Route.__str__ names both airports, in the changelist and autocompletes.
+        return super().get_queryset(request).select_related("source", "destination")
+
 
 @admin.register(Crew)
 class CrewAdmin(admin.ModelAdmin):
@@ -52,8 +97,55 @@ class AirplaneAdmin(admin.ModelAdmin):
     ordering = ("name",)
 
 
+class FlightCrewFormSet(BaseInlineFormSet):
+    """
+    Reject crew members scheduled on an overlapping flight.
+
+    The copied times are not form fields, so model validation skips the
+    exclusion constraint and the insert would fail with an IntegrityError.
+    """
+
+    def clean(self):
+        super().clean()
+        flight = self.instance
+        if flight.departure_time is None or flight.arrival_time is None:
+            return
+
+        crew = {
+            form.cleaned_data["crew"]
+            for form in self.forms
+            if form.cleaned_data.get("crew") and not self._should_delete_form(form)
+        }
+        busy = (
+            FlightCrew.objects.filter(
+                crew__in=crew,
+                departure_time__lt=flight.arrival_time,
+                arrival_time__gt=flight.departure_time,
+            )
+            .exclude(flight_id=flight.id)
+            .select_related("crew")
+        )
+        errors = [
+            f"{assignment.crew} is already scheduled on an overlapping flight."
+            for assignment in busy
+        ]
+        if errors:
+            raise ValidationError(errors)
+
+
+class FlightCrewInline(admin.TabularInline):
+    model = FlightCrew
+    formset = FlightCrewFormSet
+    extra = 1
+    autocomplete_fields = ("crew",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("crew")
+
+
 @admin.register(Flight)
-class FlightAdmin(admin.ModelAdmin):
+class FlightAdmin(LargeTableAdmin):
+    inlines = (FlightCrewInline,)
     list_display = (
         "get_source",
         "get_destination",
@@ -73,8 +165,20 @@ class FlightAdmin(admin.ModelAdmin):
         "crew__first_name",
         "crew__last_name",
     )
-    list_filter = ("route", "airplane", "departure_time", "arrival_time", "crew")
-    ordering = ("route__source__name",)
+    # Routes, airplanes and crew are found through the search box: their
+    # sidebar filters listed every row of those tables.
+    list_filter = ("departure_time", "arrival_time")
+    autocomplete_fields = ("route", "airplane")
+    ordering = ("-departure_time",)
+
+    def get_queryset(self, request):
+        # Flight.__str__, shown by the ticket autocompletes, names the airports.
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("route__source", "route__destination", "airplane")
+            .prefetch_related("crew")
+        )
 
     def get_source(self, obj):
         return obj.route.source.name
@@ -99,23 +203,42 @@ class FlightAdmin(admin.ModelAdmin):
     get_crew.short_description = "Crew"
 
 
-class TicketInline(admin.TabularInline):
+class TicketFlightMixin:
+    autocomplete_fields = ("flight",)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # The autocomplete widget renders the selected flight with __str__.
+        if db_field.name == "flight":
+            kwargs["queryset"] = Flight.objects.select_related(
+                "route__source", "route__destination"
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class TicketInline(TicketFlightMixin, admin.TabularInline):
     model = Ticket
     extra = 1
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
     list_display = ("user", "created_at")
+    list_select_related = ("user",)
     search_fields = ("user__email",)
-    list_filter = ("user__email", "created_at")
+    list_filter = ("created_at",)
+    autocomplete_fields = ("user",)
     ordering = ("-created_at",)
     inlines = (TicketInline,)
 
 
 @admin.register(Ticket)
-class TicketAdmin(admin.ModelAdmin):
-    list_display = ("flight", "row", "seat")
+class TicketAdmin(TicketFlightMixin, LargeTableAdmin):
+    list_display = ("flight", "row", "seat", "order")
+    list_select_related = (
+        "flight__route__source",
+        "flight__route__destination",
+        "order__user",
+    )
     search_fields = ("flight__airplane__name", "order__user__email")
-    list_filter = ("flight", "row", "seat")
-    ordering = ("order__user__email",)
+    autocomplete_fields = ("flight", "order")
+    ordering = ("-id",)
@@ -0,0 +1,187 @@
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db.models import (
+    Count,
+    DateField,
+    F,
+    FloatField,
+    Max,
+    OuterRef,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Cast, Coalesce, NullIf, Trunc
+from django.utils import timezone
+
+from airport.models import Airport, DailySales, Flight, Ticket
+
+ROUTE_ORDERINGS = {
+    "tickets": "-tickets",
+    "passenger_km": "-passenger_km",
+    # Routes without seats have no load factor and go last.
+    "load_factor": F("load_factor").desc(nulls_last=True),
+}
+
+
+def capacity():
+    return F("airplane__rows") * F("airplane__seats_in_row")
+
+
+def route_stats(start, end, ordering="passenger_km", limit=10):
+    """
+    Aggregate the flights departing in [start, end) per route in one query.
+
+    Ticket counts come from Flight.seats_sold, so the ticket table is not
+    scanned.
+    """
+    return (
+        Flight.objects.filter(departure_time__gte=start, departure_time__lt=end)
+        .values(
+            "route",
+            "route__source__name",
+            "route__destination__name",
+            "route__distance",
+        )
+        .annotate(
+            flights=Count("id"),
+            tickets=Sum("seats_sold"),
+            capacity=Sum(capacity()),
+            passenger_km=Sum(F("seats_sold") * F("route__distance")),
+        )
+        .annotate(
+            load_factor=Cast("tickets", FloatField())
+            / Cast(NullIf("capacity", 0), FloatField())
+        )
+        .order_by(ROUTE_ORDERINGS[ordering], "route")[:limit]
+    )
+
+
+def airport_flights(field, start, end):
+    """Flights of the window departing from or arriving at the outer airport."""
+    return (
+        Flight.objects.filter(
+            **{f"route__{field}": OuterRef("pk")},
+            departure_time__gte=start,
+            departure_time__lt=end,
+        )
+        .order_by()
+        .values(f"route__{field}")
+    )
+
+
+def airport_stats(start, end, limit=10):
+    """Return the airports with the most passengers in [start, end) in one query."""
+    annotations = {}
+    for field, prefix in (("source", "departing"), ("destination", "arriving")):
+        flights = airport_flights(field, start, end)
+        annotations[f"{prefix}_flights"] = Coalesce(
+            Subquery(flights.annotate(total=Count("id")).values("total")), 0
+        )
+        annotations[f"{prefix}_tickets"] = Coalesce(
+            Subquery(flights.annotate(total=Sum("seats_sold")).values("total")), 0
+        )
+
+    return (
+        Airport.objects.annotate(**annotations)
+        .annotate(tickets=F("departing_tickets") + F("arriving_tickets"))
+        .order_by("-tickets", "id")
+        .values(
+            "id",
+            "name",
+            "closest_big_city",
+            "departing_flights",
+            "arriving_flights",
+            "departing_tickets",
+            "arriving_tickets",
+            "tickets",
+        )[:limit]
+    )
+
+
+def window(first_day, last_day):
+    """Return the aware [start, end) bounds of the days first_day..last_day."""
+    start = timezone.make_aware(datetime.combine(first_day, time.min))
+    end = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min))
+    return start, end
+
+
+def ticket_sales(start, end, period="month"):
+    """Count orders and tickets created in [start, end) per period in one query."""
+    return (
+        Ticket.objects.filter(order__created_at__gte=start, order__created_at__lt=end)
+        .annotate(period=Trunc("order__created_at", period, output_field=DateField()))
+        .values("period")
+        .annotate(
+            orders=Count("order", distinct=True),
+            tickets=Count("id"),
+            passenger_km=Sum("flight__route__distance"),
+        )
+        .order_by("period")
+    )
+
+
+def summarized_until():
+    """Return the first day that is not in the DailySales summary yet."""
+    last_day = DailySales.objects.aggregate(day=Max("day"))["day"]
+    return last_day + timedelta(days=1) if last_day else None
+
+
+def refresh_daily_sales(first_day, last_day):
+    """Recount the DailySales rows of first_day..last_day, empty days included."""
+    counts = {
+        row.pop("period"): row
+        for row in ticket_sales(*window(first_day, last_day), "day")
+    }
+    empty = {"orders": 0, "tickets": 0, "passenger_km": 0}
+    days = [
+        DailySales(day=day, **counts.get(day, empty))
+        for day in (
+            first_day + timedelta(days=number)
+            for number in range((last_day - first_day).days + 1)
+        )
+    ]
+    DailySales.objects.bulk_create(
+        days,
+        update_conflicts=True,
+        unique_fields=["day"],
+        update_fields=["orders", "tickets", "passenger_km"],
+    )
+    return len(days)
+
+
+def sales(first_day, last_day, period="month"):
+    """
+    Count orders and tickets sold from first_day to last_day per period.
+
+    Days already in the DailySales summary are read from it, the remaining
+    recent days are counted from the tickets.
+    """
+    totals = defaultdict(Counter)
+    cutoff = summarized_until() or first_day
+
+    if first_day < cutoff:
+        summary = (
+            DailySales.objects.filter(
+                day__gte=first_day, day__lt=cutoff, day__lte=last_day, orders__gt=0
+            )
+            .annotate(period=Trunc("day", period))
+            .values("period")
+            .annotate(
+                orders=Sum("orders"),
+                tickets=Sum("tickets"),
+                passenger_km=Sum("passenger_km"),
+            )
+            .order_by("period")
+        )
+        for row in summary:
+            totals[row.pop("period")].update(row)
+
+    if cutoff <= last_day:
+        for row in ticket_sales(*window(max(first_day, cutoff), last_day), period):
+            totals[row.pop("period")].update(row)
+
+    return [
+        {"period": period, "orders": 0, "tickets": 0, "passenger_km": 0, **counts}
+        for period, counts in sorted(totals.items())
+    ]
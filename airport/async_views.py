@@ -0,0 +1,178 @@
+import asyncio
+import base64
+import weakref
+from datetime import datetime
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from airport.filters import FlightFilter
+from airport.holds import seat_holds
+from airport.models import Airport, Flight
+from airport.serializers import (
+    AirportSerializer,
+    FlightListSerializer,
+    FlightSeatMapSerializer,
+)
+from airport.views import flight_rows, tickets_available
+from user.authentication import ClaimsJWTAuthentication
+
+MAX_PAGE_SIZE = 100
+MAX_AIRPORT_RESULTS = 50
+
+_database_slots = weakref.WeakKeyDictionary()
+
+
+def limit_concurrency(view):
+    """
+    Let at most ASYNC_DB_CONCURRENCY requests of an event loop run the view.
+
+    Every async request queries from its own thread and connection, so a
+    burst of clients would otherwise open more connections than the
+    database accepts. Waiting requests only hold their client connection.
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        if loop not in _database_slots:
+            _database_slots[loop] = asyncio.Semaphore(settings.ASYNC_DB_CONCURRENCY)
+        async with _database_slots[loop]:
+            return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def authenticated(view):
+    """Require a valid JWT access token, like IsAdminOrIfAuthenticatedReadOnly."""
+    authentication = ClaimsJWTAuthentication()
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await sync_to_async(authentication.authenticate)(request)
+        except APIException as error:
+            return JsonResponse(error.get_full_details(), status=error.status_code)
+        if result is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=401,
+            )
+        request.user = result[0]
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def get_int(params, name, default, maximum):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        return default
+    return min(max(value, 1), maximum)
+
+
+def encode_cursor(row):
+    position = f"{row['departure_time'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    departure_time, flight_id = (
+        base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    )
+    return datetime.fromisoformat(departure_time), int(flight_id)
+
+
+@require_GET
+@limit_concurrency
+@authenticated
+async def flight_list(request):
+    """
+    List flights ordered by departure time with FlightFilter filters.
+
+    Pages are keyset based: `next` carries the position of the last flight.
+    """
+    filterset = FlightFilter(request.GET, queryset=flight_rows())
+    if not await sync_to_async(filterset.is_valid)():
+        return JsonResponse(filterset.errors, status=400)
+    queryset = filterset.qs.order_by("departure_time", "id")
+
+    if cursor := request.GET.get("cursor"):
+        try:
+            departure_time, flight_id = decode_cursor(cursor)
+        except ValueError:
+            return JsonResponse({"detail": "Invalid cursor"}, status=404)
+        queryset = queryset.filter(
+            Q(departure_time__gt=departure_time)
+            | Q(departure_time=departure_time, id__gt=flight_id)
+        )
+
+    page_size = get_int(request.GET, "page_size", api_settings.PAGE_SIZE, MAX_PAGE_SIZE)
+    rows = [row async for row in queryset[: page_size + 1]]
+
+    next_url = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_url = replace_query_param(
+            request.build_absolute_uri(), "cursor", encode_cursor(rows[-1])
+        )
+
+    # Serializing subtracts the held seats, which reads the cache.
+    results = await sync_to_async(lambda: FlightListSerializer(rows, many=True).data)()
+    return JsonResponse({"next": next_url, "results": results})
+
+
+@require_GET
+@limit_concurrency
+@authenticated
+async def flight_seat_map(request, pk):
+    """
+    Return the seat grid of a flight with taken seats marked as 1 and seats
+    held by checkouts as 2.
+    """
+    try:
+        flight = await (
+            Flight.objects.select_related("airplane")
+            .annotate(tickets_available=tickets_available())
+            .aget(pk=pk)
+        )
+    except Flight.DoesNotExist:
+        return JsonResponse(
+            {"detail": "No Flight matches the given query."}, status=404
+        )
+
+    taken = {seat async for seat in flight.tickets.values_list("row", "seat")}
+    held = await sync_to_async(seat_holds.held_seats)(flight.id)
+    serializer = FlightSeatMapSerializer(
+        flight, context={"taken_seats": taken, "held_seats": held}
+    )
+    return JsonResponse(serializer.data)
+
+
+@require_GET
+@limit_concurrency
+@authenticated
+async def airport_lookup(request):
+    """
+    Find airports whose name or closest big city starts with `search`,
+    optionally limited to one exact `city`.
+    """
+    queryset = Airport.objects.order_by("name", "id")
+    if search := request.GET.get("search"):
+        queryset = queryset.filter(
+            Q(name__istartswith=search) | Q(closest_big_city__istartswith=search)
+        )
+    if city := request.GET.get("city"):
+        queryset = queryset.filter(closest_big_city=city)
+
+    limit = get_int(request.GET, "limit", 10, MAX_AIRPORT_RESULTS)
+    airports = [airport async for airport in queryset[:limit]]
+    return JsonResponse(AirportSerializer(airports, many=True).data, safe=False)
@@ -0,0 +1,486 @@
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.timezone import localdate, localtime
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport import urls
+from airport.instrumentation import collect_metrics
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    FlightCrew,
+    Order,
+    Route,
+    Ticket,
+)
+
+BATCH_SIZE = 5000
+
+# Maximum number of queries each endpoint may run, whatever the data volume,
+# keyed by URL name. run_benchmark() fails on a routed URL missing here.
+# Bulk writes count the savepoint pair their atomic block takes inside a
+# transaction, and the async views the user lookup of their JWT check.
+QUERY_BUDGETS = {
+    "api-root": 0,
+    "request-metrics": 0,
+    "airport-list": 2,
+    "airport-detail": 1,
+    "airport-bulk": 4,
+    "route-list": 2,
+    "route-detail": 1,
+    "route-bulk": 4,
+    "crew-list": 2,
+    "crew-detail": 1,
+    "crew-available": 2,
+    "airplanetype-list": 2,
+    "airplanetype-detail": 1,
+    "airplane-list": 2,
+    "airplane-detail": 1,
+    "airplane-bulk": 4,
+    "flight-list": 1,
+    "flight-detail": 2,
+    "flight-seat-map": 2,
+    "flight-holds": 2,
+    "flight-itineraries": 2,
+    "flight-export": 1,
+    "order-list": 2,
+    "order-detail": 2,
+    "order-export": 1,
+    "ticket-list": 1,
+    "ticket-detail": 1,
+    "ticket-export": 1,
+    "analytics-routes": 1,
+    "analytics-airports": 1,
+    "analytics-sales": 3,
+    "async-flight-list": 2,
+    "async-flight-seat-map": 3,
+    "async-airport-lookup": 2,
+}
+
+
+class Endpoint(NamedTuple):
+    url: str
+    method: str = "get"
+    data: object = None
+    # Staff-only endpoints are requested as the staff user.
+    staff: bool = False
+
+
+def batched(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def seed(
+    airports=2000,
+    routes=10000,
+    flights=100000,
+    tickets_per_flight=10,
+    crew=5000,
+    crew_per_flight=3,
+    users=100,
+    random_seed=0,
+):
+    """Fill the database with generated reference data, flights and tickets."""
+    rng = random.Random(random_seed)
+    # Flights start tomorrow, so itinerary searches see them as upcoming.
+    start = datetime.now(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    ) + timedelta(days=1)
+
+    airport_ids = [
+        airport.id
+        for batch in batched(
+            Airport(name=f"Airport {number}", closest_big_city=f"City {number % 500}")
+            for number in range(airports)
+        )
+        for airport in Airport.objects.bulk_create(batch)
+    ]
+    route_ids = [
+        route.id
+        for batch in batched(
+            Route(
+                source_id=airport_ids[source],
+                destination_id=airport_ids[
+                    (source + rng.randrange(1, airports)) % airports
+                ],
+                distance=rng.randint(200, 5000),
+            )
+            for source in (rng.randrange(airports) for _ in range(routes))
+        )
+        for route in Route.objects.bulk_create(batch)
+    ]
+    airplane_types = AirplaneType.objects.bulk_create(
+        AirplaneType(name=name)
+        for name in ("Airbus A320", "Boeing 737", "Embraer 190", "Boeing 787")
+    )
+    airplanes = Airplane.objects.bulk_create(
+        Airplane(
+            name=f"UR-{number:04d}",
+            rows=rng.randint(20, 40),
+            seats_in_row=rng.choice((4, 6)),
+            airplane_type=rng.choice(airplane_types),
+        )
+        for number in range(max(flights // 100, 1))
+    )
+    crew_ids = [
+        member.id
+        for batch in batched(
+            Crew(first_name=f"First {number}", last_name=f"Last {number}")
+            for number in range(crew)
+        )
+        for member in Crew.objects.bulk_create(batch)
+    ]
+    user_ids = [
+        user.id
+        for user in get_user_model().objects.bulk_create(
+            get_user_model()(email=f"user{number}@example.com")
+            for number in range(users)
+        )
+    ]
+
+    crew_offsets = {}
+    for batch in batched(range(flights), 1000):
+        flight_objects = []
+        for number in batch:
+            airplane = airplanes[number % len(airplanes)]
+            departure_time = start + timedelta(hours=number // len(airplanes) * 6)
+            flight_objects.append(
+                Flight(
+                    route_id=rng.choice(route_ids),
+                    airplane=airplane,
+                    departure_time=departure_time,
+                    arrival_time=departure_time
+                    + timedelta(minutes=rng.randint(60, 300)),
+                    seats_sold=tickets_per_flight,
+                )
+            )
+        flight_objects = Flight.objects.bulk_create(flight_objects)
+
+        # Flights of the same departure slot get distinct crew members, so
+        # nobody is on two overlapping flights as long as the crew covers
+        # every airplane of a slot.
+        assignments = []
+        for number, flight in zip(batch, flight_objects):
+            slot = number // len(airplanes)
+            if slot not in crew_offsets:
+                crew_offsets[slot] = rng.randrange(len(crew_ids))
+            first = crew_offsets[slot] + number % len(airplanes) * crew_per_flight
+            assignments.extend(
+                FlightCrew(
+                    flight_id=flight.id,
+                    crew_id=crew_ids[(first + position) % len(crew_ids)],
+                    departure_time=flight.departure_time,
+                    arrival_time=flight.arrival_time,
+                )
+                for position in range(crew_per_flight)
+            )
+        FlightCrew.objects.bulk_create(assignments)
+
+        orders = Order.objects.bulk_create(
+            Order(user_id=rng.choice(user_ids))
+            for _ in range((len(flight_objects) * tickets_per_flight + 1) // 2)
+        )
+        for ticket_batch in batched(
+            Ticket(
+                flight=flight,
+                order=orders[(index * tickets_per_flight + seat_number) // 2],
+                row=seat_number // flight.airplane.seats_in_row + 1,
+                seat=seat_number % flight.airplane.seats_in_row + 1,
+            )
+            for index, flight in enumerate(flight_objects)
+            for seat_number in range(tickets_per_flight)
+        ):
+            Ticket.objects.bulk_create(ticket_batch)
+
+
+def get_endpoints(user):
+    """Return the requests to measure, keyed by their URL name."""
+    flight = Flight.objects.select_related("route", "airplane").order_by("id").first()
+    order = user.orders.order_by("id").first()
+    ticket = order.tickets.order_by("id").first()
+    day = localtime(flight.departure_time).date()
+    window = f"?date_from={min(day, localdate())}&date_to={max(day, localdate())}"
+    airports = Airport.objects.order_by("id")[:10]
+    routes = Route.objects.order_by("id")[:10]
+    airplanes = Airplane.objects.order_by("id")[:10]
+
+    return {
+        "api-root": Endpoint(reverse("airport:api-root")),
+        "request-metrics": Endpoint(reverse("airport:request-metrics"), staff=True),
+        "airport-list": Endpoint(reverse("airport:airport-list")),
+        "airport-detail": Endpoint(
+            reverse("airport:airport-detail", args=[flight.route.source_id])
+        ),
+        # Bulk updates write the current values back, so they change nothing.
+        "airport-bulk": Endpoint(
+            reverse("airport:airport-bulk"),
+            "patch",
+            [{"id": airport.id, "name": airport.name} for airport in airports],
+            staff=True,
+        ),
+        "route-list": Endpoint(reverse("airport:route-list")),
+        "route-detail": Endpoint(
+            reverse("airport:route-detail", args=[flight.route_id])
+        ),
+        "route-bulk": Endpoint(
+            reverse("airport:route-bulk"),
+            "patch",
+            [{"id": route.id, "distance": route.distance} for route in routes],
+            staff=True,
+        ),
+        "crew-list": Endpoint(reverse("airport:crew-list")),
+        "crew-detail": Endpoint(
+            reverse(
+                "airport:crew-detail",
+                args=[flight.crew_assignments.order_by("id").first().crew_id],
+            )
+        ),
+        "crew-available": Endpoint(
+            reverse("airport:crew-available")
+            + "?"
+            + urlencode({"start": flight.departure_time, "end": flight.arrival_time})
+        ),
+        "airplanetype-list": Endpoint(reverse("airport:airplanetype-list")),
+        "airplanetype-detail": Endpoint(
+            reverse(
+                "airport:airplanetype-detail", args=[flight.airplane.airplane_type_id]
+            )
+        ),
+        "airplane-list": Endpoint(reverse("airport:airplane-list")),
+        "airplane-detail": Endpoint(
+            reverse("airport:airplane-detail", args=[flight.airplane_id])
+        ),
+        "airplane-bulk": Endpoint(
+            reverse("airport:airplane-bulk"),
+            "patch",
+            [{"id": airplane.id, "name": airplane.name} for airplane in airplanes],
+            staff=True,
+        ),
+        "flight-list": Endpoint(reverse("airport:flight-list")),
+        "flight-detail": Endpoint(reverse("airport:flight-detail", args=[flight.id])),
+        "flight-seat-map": Endpoint(
+            reverse("airport:flight-seat-map", args=[flight.id])
+        ),
+        # The last seat is never sold by seed(), and holding it again only
+        # extends the hold.
+        "flight-holds": Endpoint(
+            reverse("airport:flight-holds", args=[flight.id]),
+            "post",
+            {
+                "seats": [
+                    {"row": flight.airplane.rows, "seat": flight.airplane.seats_in_row}
+                ]
+            },
+            staff=True,
+        ),
+        "flight-itineraries": Endpoint(
+            reverse("airport:flight-itineraries") + f"?source={flight.route.source_id}"
+            f"&destination={flight.route.destination_id}"
+            f"&departure_date={day}"
+        ),
+        "flight-export": Endpoint(
+            reverse("airport:flight-export") + f"?route={flight.route_id}",
+            staff=True,
+        ),
+        "order-list": Endpoint(reverse("airport:order-list")),
+        "order-detail": Endpoint(reverse("airport:order-detail", args=[order.id])),
+        "order-export": Endpoint(
+            reverse("airport:order-export") + f"?flight={flight.id}", staff=True
+        ),
+        "ticket-list": Endpoint(reverse("airport:ticket-list")),
+        "ticket-detail": Endpoint(reverse("airport:ticket-detail", args=[ticket.id])),
+        "ticket-export": Endpoint(
+            reverse("airport:ticket-export") + f"?flight={flight.id}", staff=True
+        ),
+        "analytics-routes": Endpoint(
+            reverse("airport:analytics-routes") + window, staff=True
+        ),
+        "analytics-airports": Endpoint(
+            reverse("airport:analytics-airports") + window, staff=True
+        ),
+        "analytics-sales": Endpoint(
+            reverse("airport:analytics-sales") + window, staff=True
+        ),
+        "async-flight-list": Endpoint(reverse("airport:async-flight-list")),
+        "async-flight-seat-map": Endpoint(
+            reverse("airport:async-flight-seat-map", args=[flight.id])
+        ),
+        "async-airport-lookup": Endpoint(
+            reverse("airport:async-airport-lookup") + "?search=Airport"
+        ),
+    }
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(round(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def send(client, endpoint):
+    """Send the request and read the whole body, also of streamed exports."""
+    response = getattr(client, endpoint.method)(
+        endpoint.url, endpoint.data, format="json"
+    )
+    if response.streaming:
+        b"".join(response.streaming_content)
+    return response
+
+
+def measure(client, endpoint, requests):
+    """Send the request with a cold response cache and collect its timings."""
+    latencies = []
+    serialization = []
+    for _ in range(requests):
+        cache.clear()
+        with collect_metrics() as metrics:
+            started = time.perf_counter()
+            response = send(client, endpoint)
+            latencies.append(time.perf_counter() - started)
+        serialization.append(metrics.serializer_time)
+
+    return {
+        "url": endpoint.url,
+        "method": endpoint.method.upper(),
+        "status": response.status_code,
+        "queries": len(metrics.queries),
+        "max_queries": None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "serialization_p50_ms": round(percentile(serialization, 50) * 1000, 2),
+        "serialization_p95_ms": round(percentile(serialization, 95) * 1000, 2),
+    }
+
+
+def get_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    # The async views authenticate the JWT access token themselves.
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    return client
+
+
+def run_benchmark(user, staff, requests=20):
+    """
+    Measure every routed airport endpoint, the staff-only ones as `staff`,
+    and return a report keyed by URL name.
+
+    Raises ValueError when a routed URL has no request or query budget.
+    """
+    endpoints = get_endpoints(user)
+    routed = {pattern.name for pattern in urls.urlpatterns if pattern.name}
+    unmeasured = (routed - endpoints.keys()) | (routed - QUERY_BUDGETS.keys())
+    if unmeasured:
+        raise ValueError(f"No query budget for: {', '.join(sorted(unmeasured))}")
+
+    clients = {False: get_client(user), True: get_client(staff)}
+    report = {}
+    for name, endpoint in endpoints.items():
+        client = clients[endpoint.staff]
+        send(client, endpoint)
+        report[name] = measure(client, endpoint, requests)
+        report[name]["max_queries"] = QUERY_BUDGETS[name]
+    return report
+
+
+async def fetch(url, headers, delay=0):
+    """
+    Send one GET request on a new connection and return the status code.
+
+    With a `delay` the headers are sent that many seconds after the request
+    line, like a client on a slow network.
+    """
+    parts = urlsplit(url)
+    target = f"{parts.path or '/'}?{parts.query}" if parts.query else parts.path or "/"
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    try:
+        writer.write(f"GET {target} HTTP/1.1\r\n".encode())
+        await writer.drain()
+        await asyncio.sleep(delay)
+
+        lines = [
+            f"Host: {parts.netloc}",
+            "Connection: close",
+            *(f"{name}: {value}" for name, value in headers.items()),
+        ]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    return int(status_line.split()[1])
+
+
+async def load_test(
+    url, concurrency, requests, headers=None, timeout=30, slow_clients=0, delay=5
+):
+    """
+    Keep `concurrency` connections busy until `requests` responses arrived
+    and return the status counts and latencies.
+
+    Meanwhile `slow_clients` more connections keep sending requests that
+    each take `delay` seconds to arrive. A server that ties a thread to
+    every connection stops answering the other clients while they wait.
+    """
+    headers = headers or {}
+    pending = iter(range(requests))
+    statuses = Counter()
+    slow_statuses = Counter()
+    latencies = []
+    finished = asyncio.Event()
+
+    async def request(delay=0):
+        try:
+            status = await asyncio.wait_for(fetch(url, headers, delay), timeout)
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            status = "error"
+        return str(status)
+
+    async def client():
+        for _ in pending:
+            started = time.perf_counter()
+            statuses[await request()] += 1
+            latencies.append(time.perf_counter() - started)
+
+    async def slow_client(number):
+        await asyncio.sleep(delay * number / slow_clients)
+        while not finished.is_set():
+            slow_statuses[await request(delay)] += 1
+
+    slow = [asyncio.create_task(slow_client(number)) for number in range(slow_clients)]
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    finished.set()
+    await asyncio.gather(*slow)
+
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": sum(
+            count for status, count in statuses.items() if status.startswith("2")
+        ),
+        "statuses": dict(statuses),
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "slow_requests": dict(slow_statuses),
+    }
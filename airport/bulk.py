@@ -0,0 +1,79 @@
+from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from airport.cache import invalidate
+
+MAX_BATCH_SIZE = 1000
+
+
+class BulkErrorSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    errors = serializers.DictField()
+
+
+def bulk_schema(serializer_class):
+    """Document the `bulk/` action of a viewset writing `serializer_class`."""
+    name = serializer_class.Meta.model.__name__
+    return extend_schema(
+        request=serializer_class(many=True),
+        responses=inline_serializer(
+            name=f"{name}BulkResult",
+            fields={
+                "results": serializer_class(many=True),
+                "errors": BulkErrorSerializer(many=True),
+            },
+        ),
+    )
+
+
+class BulkWriteMixin:
+    """
+    Add a staff-only `bulk/` action creating (POST) or updating (PATCH) up
+    to MAX_BATCH_SIZE objects from a list payload.
+
+    The serializer's BulkListSerializer writes the valid items with one
+    insert or update. Invalid items are skipped and returned under
+    `errors` with their index. The response is 400 only when every item
+    is invalid.
+    """
+
+    @action(detail=False, methods=["post", "patch"])
+    def bulk(self, request):
+        """
+        Create (POST) or update (PATCH, with `id`s) a list of objects.
+        Invalid items are reported by index and do not stop the others.
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError("Expected a list of objects.")
+
+        instance = None
+        if request.method == "PATCH":
+            ids = [item.get("id") for item in request.data if isinstance(item, dict)]
+            instance = list(
+                self.get_queryset().filter(id__in=[pk for pk in ids if type(pk) is int])
+            )
+
+        serializer = self.get_serializer(
+            instance,
+            data=request.data,
+            many=True,
+            partial=instance is not None,
+            allow_empty=False,
+            max_length=MAX_BATCH_SIZE,
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        invalidate(*getattr(self, "cache_models", ()))
+
+        errors = serializer.item_errors
+        results = serializer.data
+        if errors and not results:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif instance is None:
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_200_OK
+        return Response({"results": results, "errors": errors}, status=response_status)
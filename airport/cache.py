@@ -0,0 +1,95 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def version_key(model):
+    return f"airport:version:{model._meta.label_lower}"
+
+
+def get_versions(models):
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A fresh version never matches responses cached before eviction.
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*models):
+    """Bump cache versions of the models once the current transaction commits."""
+
+    def bump_versions():
+        for model in models:
+            key = version_key(model)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, time.time_ns(), timeout=None)
+
+    transaction.on_commit(bump_versions)
+
+
+def get_etag(data):
+    content = json.dumps(data, cls=JSONEncoder, sort_keys=True).encode()
+    return f'"{hashlib.md5(content).hexdigest()}"'
+
+
+class CachedResponseMixin:
+    """
+    Cache list and retrieve responses until one of `cache_models` changes.
+
+    Responses carry an ETag, and requests whose If-None-Match matches it
+    get an empty 304 response.
+    """
+
+    cache_models = ()
+
+    def get_cache_key(self, request):
+        versions = "-".join(str(version) for version in get_versions(self.cache_models))
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return f"airport:response:{self.basename}:{versions}:{path}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cached = (response.data, get_etag(response.data))
+            cache.set(key, cached, settings.RESPONSE_CACHE_TIMEOUT)
+
+        data, etag = cached
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return Response(data, headers={"ETag": etag})
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        invalidate(*self.cache_models)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate(*self.cache_models)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidate(*self.cache_models)
@@ -0,0 +1,20 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatTaken(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This seat is already taken on this flight."
+    default_code = "seat_taken"
+
+
+class SeatHoldLimit(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Too many seats of this flight are held by this checkout."
+    default_code = "seat_hold_limit"
+
+
+class ScheduleConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The flight overlaps another flight of its airplane or crew."
+    default_code = "schedule_conflict"
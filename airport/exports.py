@@ -0,0 +1,180 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+from typing import Callable, NamedTuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+
+from airport.models import Flight, Order, Ticket
+from airport.serializers import ExportQuerySerializer
+
+CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class Export(NamedTuple):
+    queryset: Callable
+    # Column name -> lookup of values_list().
+    columns: dict
+    # Query parameter -> lookup it filters on.
+    filters: dict
+    # Whether the filters join a to-many relation and repeat rows.
+    distinct: bool = False
+
+
+EXPORTS = {
+    "flights": Export(
+        queryset=lambda: Flight.objects.all(),
+        columns={
+            "id": "id",
+            "route": "route",
+            "source": "route__source__name",
+            "destination": "route__destination__name",
+            "airplane": "airplane__name",
+            "departure_time": "departure_time",
+            "arrival_time": "arrival_time",
+            "seats_sold": "seats_sold",
+        },
+        filters={"flight": "id", "route": "route", "date": "departure_time"},
+    ),
+    "tickets": Export(
+        queryset=lambda: Ticket.objects.all(),
+        columns={
+            "id": "id",
+            "flight": "flight",
+            "source": "flight__route__source__name",
+            "destination": "flight__route__destination__name",
+            "departure_time": "flight__departure_time",
+            "row": "row",
+            "seat": "seat",
+            "order": "order",
+            "passenger": "order__user__email",
+        },
+        filters={
+            "flight": "flight",
+            "route": "flight__route",
+            "date": "flight__departure_time",
+        },
+    ),
+    "orders": Export(
+        queryset=lambda: Order.objects.all(),
+        columns={
+            "id": "id",
+            "created_at": "created_at",
+            "user": "user__email",
+        },
+        filters={
+            "flight": "tickets__flight",
+            "route": "tickets__flight__route",
+            "date": "created_at",
+        },
+        distinct=True,
+    ),
+}
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_rows(export, params):
+    lookups = {}
+    for name in ("flight", "route"):
+        if params.get(name) is not None:
+            lookups[export.filters[name]] = params[name]
+    if params.get("date_from"):
+        lookups[f"{export.filters['date']}__gte"] = day_start(params["date_from"])
+    if params.get("date_to"):
+        lookups[f"{export.filters['date']}__lt"] = day_start(
+            params["date_to"] + timedelta(days=1)
+        )
+
+    queryset = export.queryset().filter(**lookups)
+    if lookups and export.distinct:
+        queryset = queryset.distinct()
+
+    return (
+        queryset.order_by("id")
+        .values_list(*export.columns.values())
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+class Echo:
+    """File-like object that returns what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def buffered(lines, size=CHUNK_SIZE):
+    """Join lines into chunks of `size` so the server sends fewer writes."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def stream_export(name, params):
+    """Return a streaming response with the rows of an export as CSV or NDJSON."""
+    export = EXPORTS[name]
+    output = params["output"]
+    lines = {"csv": csv_lines, "ndjson": ndjson_lines}[output]
+
+    response = StreamingHttpResponse(
+        buffered(lines(list(export.columns), filter_rows(export, params))),
+        content_type=CONTENT_TYPES[output],
+    )
+    response["Content-Disposition"] = f'attachment; filename="{name}.{output}"'
+    return response
+
+
+class ExportMixin:
+    """
+    Add a staff-only `export/` action that streams every matching row.
+
+    Rows are read with a server-side cursor in chunks of CHUNK_SIZE, so
+    memory stays flat whatever the size of the export.
+    """
+
+    export_name = None
+
+    @extend_schema(
+        parameters=[ExportQuerySerializer],
+        responses={
+            (200, content_type): OpenApiTypes.STR
+            for content_type in CONTENT_TYPES.values()
+        },
+    )
+    @action(detail=False, methods=["get"], permission_classes=(IsAdminUser,))
+    def export(self, request):
+        """Stream the matching rows as CSV or NDJSON (`output`)."""
+        query = ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return stream_export(self.export_name, query.validated_data)
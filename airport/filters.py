@@ -0,0 +1,22 @@
+from django_filters import rest_framework as filters
+
+from airport.models import Flight
+
+
+class FlightFilter(filters.FilterSet):
+    source = filters.NumberFilter(field_name="route__source")
+    destination = filters.NumberFilter(field_name="route__destination")
+    source_city = filters.CharFilter(field_name="route__source__closest_big_city")
+    destination_city = filters.CharFilter(
+        field_name="route__destination__closest_big_city"
+    )
+    departure_date = filters.DateFromToRangeFilter(field_name="departure_time")
+    min_seats_left = filters.NumberFilter(
+        field_name="tickets_available", lookup_expr="gte"
+    )
+    min_seats_sold = filters.NumberFilter(field_name="seats_sold", lookup_expr="gte")
+    max_seats_sold = filters.NumberFilter(field_name="seats_sold", lookup_expr="lte")
+
+    class Meta:
+        model = Flight
+        fields = ["route", "airplane"]
@@ -0,0 +1,208 @@
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
+
+from airport.exceptions import SeatHoldLimit, SeatTaken
+
+
+class SeatHolds:
+    """
+    Short-lived seat holds of checkouts, kept in front of the ticket table.
+
+    Holds are stored per flight as {(row, seat): (holder, expires_at)} and
+    expired entries are purged lazily whenever a flight's holds are read
+    or written. Subclasses provide the storage and a per-flight lock, which
+    must be re-entrant within a thread.
+    """
+
+    max_seats_per_holder = 10
+
+    def _locked(self, flight_id):
+        raise NotImplementedError
+
+    def _load(self, flight_id):
+        raise NotImplementedError
+
+    def _load_many(self, flight_ids):
+        raise NotImplementedError
+
+    def _store(self, flight_id, holds):
+        raise NotImplementedError
+
+    @staticmethod
+    def _active(holds, now):
+        return {
+            seat: (holder, expires_at)
+            for seat, (holder, expires_at) in holds.items()
+            if expires_at > now
+        }
+
+    def hold(self, flight_id, seats, holder, ttl=None, sold=None):
+        """
+        Hold all the seats for the holder or none of them.
+
+        Holding seats again extends the holds. Raises SeatTaken when another
+        holder has one of the seats, or when `sold(seats)` reports one of
+        them sold while the flight is locked, and SeatHoldLimit when the
+        holder would hold more than `max_seats_per_holder` seats of the
+        flight. Returns the expiry timestamp.
+        """
+        now = time.time()
+        expires_at = now + (settings.SEAT_HOLD_TTL if ttl is None else ttl)
+        with self._locked(flight_id):
+            holds = self._active(self._load(flight_id), now)
+            if any(seat in holds and holds[seat][0] != holder for seat in seats):
+                raise SeatTaken("This seat is held by another checkout.")
+            own = {seat for seat, (owner, _) in holds.items() if owner == holder}
+            if len(own.union(seats)) > self.max_seats_per_holder:
+                raise SeatHoldLimit(
+                    f"A checkout can hold at most {self.max_seats_per_holder} "
+                    "seats of a flight."
+                )
+            if sold is not None and sold(seats):
+                raise SeatTaken()
+            for seat in seats:
+                holds[seat] = (holder, expires_at)
+            self._store(flight_id, holds)
+        return expires_at
+
+    @contextmanager
+    def booking(self, seats, holder):
+        """
+        Check the holds of the seats, given as {flight_id: [(row, seat)]},
+        and keep the flights locked while the tickets are written so no
+        hold can be taken on a seat being sold.
+        """
+        with ExitStack() as stack:
+            for flight_id in sorted(seats):
+                stack.enter_context(self._locked(flight_id))
+                self.check(flight_id, seats[flight_id], holder)
+            yield
+
+    def release(self, flight_id, holder, seats=None):
+        """Drop the holder's holds of the seats, or of the whole flight."""
+        with self._locked(flight_id):
+            holds = self._active(self._load(flight_id), time.time())
+            for seat in list(holds if seats is None else seats):
+                if seat in holds and holds[seat][0] == holder:
+                    del holds[seat]
+            self._store(flight_id, holds)
+
+    def check(self, flight_id, seats, holder):
+        """Raise SeatTaken if another holder has one of the seats."""
+        holds = self.held_seats(flight_id)
+        if any(seat in holds and holds[seat] != holder for seat in seats):
+            raise SeatTaken("This seat is held by another checkout.")
+
+    def held_seats(self, flight_id):
+        """Return the holders of the held seats of a flight."""
+        holds = self._active(self._load(flight_id), time.time())
+        return {seat: holder for seat, (holder, _) in holds.items()}
+
+    def held_counts(self, flight_ids):
+        """Return the number of held seats of every flight with holds."""
+        now = time.time()
+        counts = {}
+        for flight_id, holds in self._load_many(flight_ids).items():
+            if count := len(self._active(holds, now)):
+                counts[flight_id] = count
+        return counts
+
+
+class LocalSeatHolds(SeatHolds):
+    """Holds in the memory of this process, for a single server."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._holds = {}
+
+    @contextmanager
+    def _locked(self, flight_id):
+        with self._lock:
+            yield
+
+    def _load(self, flight_id):
+        with self._lock:
+            holds = self._active(self._holds.get(flight_id, {}), time.time())
+            self._store(flight_id, holds)
+            return dict(holds)
+
+    def _load_many(self, flight_ids):
+        return {
+            flight_id: holds
+            for flight_id in flight_ids
+            if (holds := self._load(flight_id))
+        }
+
+    def _store(self, flight_id, holds):
+        with self._lock:
+            if holds:
+                self._holds[flight_id] = holds
+            else:
+                self._holds.pop(flight_id, None)
+
+
+class CacheSeatHolds(SeatHolds):
+    """
+    Holds in the default cache, shared by every server using it.
+
+    Writers of a flight are serialized with a lock key taken by cache.add(),
+    which is atomic on the shared cache backends. A thread already holding
+    the lock of a flight enters it again without waiting.
+    """
+
+    lock_timeout = 5
+    lock_wait = 2
+
+    def __init__(self):
+        self._owned = threading.local()
+
+    @staticmethod
+    def _key(flight_id):
+        return f"airport:holds:{flight_id}"
+
+    @contextmanager
+    def _locked(self, flight_id):
+        if not hasattr(self._owned, "flights"):
+            self._owned.flights = set()
+        owned = self._owned.flights
+        if flight_id in owned:
+            yield
+            return
+        key = f"{self._key(flight_id)}:lock"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_wait
+        while not cache.add(key, token, self.lock_timeout):
+            if time.monotonic() > deadline:
+                raise SeatTaken("The seats of this flight are busy, try again.")
+            time.sleep(0.005)
+        owned.add(flight_id)
+        try:
+            yield
+        finally:
+            owned.discard(flight_id)
+            if cache.get(key) == token:
+                cache.delete(key)
+
+    def _load(self, flight_id):
+        return cache.get(self._key(flight_id)) or {}
+
+    def _load_many(self, flight_ids):
+        keys = {self._key(flight_id): flight_id for flight_id in flight_ids}
+        return {keys[key]: holds for key, holds in cache.get_many(keys).items()}
+
+    def _store(self, flight_id, holds):
+        if not holds:
+            cache.delete(self._key(flight_id))
+            return
+        timeout = max(expires_at for _, expires_at in holds.values()) - time.time()
+        cache.set(self._key(flight_id), holds, max(int(timeout) + 1, 1))
+
+
+seat_holds = SimpleLazyObject(lambda: import_string(settings.SEAT_HOLD_BACKEND)())
@@ -0,0 +1,201 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+BUCKET_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    """SQL statements, serializer and view time collected for a request."""
+
+    def __init__(self):
+        self.queries = []
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.view_started = None
+
+    @property
+    def sql_time(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def top_queries(self, limit=5):
+        return sorted(self.queries, reverse=True)[:limit]
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - started, sql))
+
+
+class SerializerTiming:
+    """
+    Time top-level serializer `.data` calls while metrics are collected.
+
+    `serializers.BaseSerializer.data` is replaced only while at least one
+    collect_metrics() block is open and the original property is put back
+    when the last one closes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._original = None
+
+    def _timed(self, data):
+        def timed_data(serializer):
+            metrics = _current_metrics.get()
+            if metrics is None or metrics.serializing:
+                return data.fget(serializer)
+
+            metrics.serializing = True
+            started = time.perf_counter()
+            try:
+                return data.fget(serializer)
+            finally:
+                metrics.serializer_time += time.perf_counter() - started
+                metrics.serializing = False
+
+        return property(timed_data)
+
+    def acquire(self):
+        with self._lock:
+            if not self._users:
+                self._original = serializers.BaseSerializer.data
+                serializers.BaseSerializer.data = self._timed(self._original)
+            self._users += 1
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            if not self._users:
+                serializers.BaseSerializer.data = self._original
+                self._original = None
+
+
+serializer_timing = SerializerTiming()
+
+
+@contextmanager
+def collect_metrics():
+    metrics = RequestMetrics()
+    token = _current_metrics.set(metrics)
+    serializer_timing.acquire()
+    try:
+        with connection.execute_wrapper(metrics):
+            yield metrics
+    finally:
+        serializer_timing.release()
+        _current_metrics.reset(token)
+
+
+class EndpointHistograms:
+    """Per-endpoint request duration histograms of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def observe(self, endpoint, duration_ms):
+        with self._lock:
+            histogram = self._endpoints.setdefault(
+                endpoint,
+                {
+                    "count": 0,
+                    "sum_ms": 0.0,
+                    "buckets": [0] * (len(BUCKET_BOUNDS_MS) + 1),
+                },
+            )
+            histogram["count"] += 1
+            histogram["sum_ms"] += duration_ms
+            histogram["buckets"][bisect_left(BUCKET_BOUNDS_MS, duration_ms)] += 1
+
+    def export(self):
+        with self._lock:
+            return {
+                "bucket_bounds_ms": list(BUCKET_BOUNDS_MS),
+                "endpoints": {
+                    endpoint: {**histogram, "buckets": list(histogram["buckets"])}
+                    for endpoint, histogram in self._endpoints.items()
+                },
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+histograms = EndpointHistograms()
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Report query count, SQL, serializer, view and total time of every request.
+
+    Timings are returned in a Server-Timing header and added to the
+    per-endpoint histograms, and requests slower than
+    SLOW_REQUEST_THRESHOLD_MS are logged with their slowest statements.
+    View time runs from the view middleware to the returned response, total
+    time covers the other middleware as well. The middleware removes itself
+    unless REQUEST_INSTRUMENTATION is on.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with collect_metrics() as metrics:
+            response = self.get_response(request)
+        finished = time.perf_counter()
+        duration_ms = (finished - started) * 1000
+
+        timings = [
+            f'db;dur={metrics.sql_time * 1000:.2f};desc="{len(metrics.queries)} queries"',
+            f"serializer;dur={metrics.serializer_time * 1000:.2f}",
+        ]
+        if metrics.view_started is not None:
+            timings.append(f"view;dur={(finished - metrics.view_started) * 1000:.2f}")
+        timings.append(f"total;dur={duration_ms:.2f}")
+        response["Server-Timing"] = ", ".join(timings)
+
+        match = request.resolver_match
+        endpoint = f"{request.method} {match.view_name if match else '<unresolved>'}"
+        histograms.observe(endpoint, duration_ms)
+
+        if duration_ms >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            logger.warning(
+                "Slow request %s %s: %.0f ms, %d queries, %.0f ms SQL\n%s",
+                request.method,
+                request.get_full_path(),
+                duration_ms,
+                len(metrics.queries),
+                metrics.sql_time * 1000,
+                "\n".join(
+                    f"  {duration * 1000:.1f} ms: {sql}"
+                    for duration, sql in metrics.top_queries()
+                ),
+            )
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # The views of the request start after URL resolution, once the view
+        # middleware is reached.
+        if metrics := _current_metrics.get():
+            metrics.view_started = time.perf_counter()
@@ -0,0 +1,247 @@
+import bisect
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from operator import attrgetter
+from typing import NamedTuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from airport.models import Flight, Route
+
+
+class Leg(NamedTuple):
+    departure_time: datetime
+    arrival_time: datetime
+    flight_id: int
+    route_id: int
+    source_id: int
+    destination_id: int
+    distance: int
+
+
+ORDERINGS = {
+    "distance": lambda legs: (
+        sum(leg.distance for leg in legs),
+        len(legs),
+        legs[-1].arrival_time,
+    ),
+    "hops": lambda legs: (len(legs), legs[-1].arrival_time),
+    "arrival": lambda legs: (legs[-1].arrival_time, len(legs)),
+}
+
+by_departure = attrgetter("departure_time")
+
+
+class FlightIndex:
+    """
+    In-memory adjacency index of upcoming flights departing from every
+    airport.
+
+    The index is built lazily with one query, kept up to date by the
+    Route/Flight signals of this process and fully rebuilt once it is
+    older than ITINERARY_INDEX_TTL seconds to pick up writes made by
+    other processes. The departure lists are replaced rather than changed
+    in place, so searches read them without holding the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built_at = None
+        self._routes = {}
+        self._route_flights = defaultdict(set)
+        self._flights = {}
+        self._departures = defaultdict(list)
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def _ensure_built(self):
+        if (
+            self._built_at is None
+            or time.monotonic() - self._built_at > settings.ITINERARY_INDEX_TTL
+        ):
+            self._build()
+
+    def _build(self):
+        # Flights and their routes come from one query, so they are read
+        # from one snapshot. update_flight() fetches routes added later.
+        self._routes = {}
+        self._route_flights = defaultdict(set)
+        self._flights = {}
+        self._departures = defaultdict(list)
+
+        for flight_id, route_id, departure, arrival, *route in Flight.objects.filter(
+            departure_time__gte=timezone.now()
+        ).values_list(
+            "id",
+            "route_id",
+            "departure_time",
+            "arrival_time",
+            "route__source_id",
+            "route__destination_id",
+            "route__distance",
+        ):
+            self._routes[route_id] = tuple(route)
+            leg = Leg(departure, arrival, flight_id, route_id, *route)
+            self._route_flights[route_id].add(flight_id)
+            self._flights[flight_id] = leg
+            self._departures[leg.source_id].append(leg)
+
+        for legs in self._departures.values():
+            legs.sort(key=by_departure)
+
+        self._built_at = time.monotonic()
+
+    def _add_leg(self, leg):
+        self._route_flights[leg.route_id].add(leg.flight_id)
+        self._flights[leg.flight_id] = leg
+        legs = list(self._departures[leg.source_id])
+        bisect.insort(legs, leg, key=by_departure)
+        self._departures[leg.source_id] = legs
+
+    def _remove_leg(self, flight_id):
+        leg = self._flights.pop(flight_id, None)
+        if leg is None:
+            return
+        self._route_flights[leg.route_id].discard(flight_id)
+        self._departures[leg.source_id] = [
+            other for other in self._departures[leg.source_id] if other is not leg
+        ]
+
+    def update_route(self, route):
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._routes[route.id] = (
+                route.source_id,
+                route.destination_id,
+                route.distance,
+            )
+            for flight_id in list(self._route_flights[route.id]):
+                leg = self._flights[flight_id]
+                self._remove_leg(flight_id)
+                self._add_leg(
+                    Leg(
+                        leg.departure_time,
+                        leg.arrival_time,
+                        flight_id,
+                        route.id,
+                        *self._routes[route.id],
+                    )
+                )
+
+    def remove_route(self, route_id):
+        with self._lock:
+            for flight_id in list(self._route_flights.get(route_id, ())):
+                self._remove_leg(flight_id)
+            self._route_flights.pop(route_id, None)
+            self._routes.pop(route_id, None)
+
+    def update_flight(self, flight):
+        with self._lock:
+            if self._built_at is None:
+                return
+            if flight.route_id not in self._routes:
+                self.update_route(Route.objects.get(id=flight.route_id))
+            self._remove_leg(flight.id)
+            if flight.departure_time < timezone.now():
+                return
+            self._add_leg(
+                Leg(
+                    flight.departure_time,
+                    flight.arrival_time,
+                    flight.id,
+                    flight.route_id,
+                    *self._routes[flight.route_id],
+                )
+            )
+
+    def remove_flight(self, flight_id):
+        with self._lock:
+            self._remove_leg(flight_id)
+
+    @staticmethod
+    def _departing(departures, airport_id, earliest, latest):
+        legs = departures.get(airport_id, ())
+        start = bisect.bisect_left(legs, earliest, key=by_departure)
+        end = bisect.bisect_right(legs, latest, key=by_departure)
+        return legs[start:end]
+
+    def search(
+        self,
+        source_id,
+        destination_id,
+        earliest_departure,
+        latest_departure,
+        min_connection,
+        max_connection,
+        max_hops,
+        ordering,
+        limit,
+    ):
+        """
+        Return up to `limit` itineraries as tuples of legs, best first.
+
+        Every ordering key only grows when an itinerary is extended by
+        another leg, so a best-first search pops complete itineraries in
+        their final order and can stop as soon as `limit` are found.
+
+        Partial itineraries ending with the same flight after the same
+        number of hops have the same onward connections, so only the
+        `limit` best of them are extended. After ITINERARY_MAX_EXPANSIONS
+        expansions the search only returns the itineraries already queued.
+        """
+        key = ORDERINGS[ordering]
+        counter = itertools.count()
+        queue = []
+        itineraries = []
+        reached = defaultdict(int)
+        expansions = 0
+
+        with self._lock:
+            self._ensure_built()
+            departures = self._departures
+
+        for leg in self._departing(
+            departures,
+            source_id,
+            max(earliest_departure, timezone.now()),
+            latest_departure,
+        ):
+            heapq.heappush(queue, (key((leg,)), next(counter), (leg,)))
+
+        while queue and len(itineraries) < limit:
+            _, _, legs = heapq.heappop(queue)
+            last = legs[-1]
+
+            if last.destination_id == destination_id:
+                itineraries.append(legs)
+                continue
+            if len(legs) == max_hops or expansions >= settings.ITINERARY_MAX_EXPANSIONS:
+                continue
+            reached[last.flight_id, len(legs)] += 1
+            if reached[last.flight_id, len(legs)] > limit:
+                continue
+
+            expansions += 1
+            visited = {source_id, *(leg.destination_id for leg in legs)}
+            for leg in self._departing(
+                departures,
+                last.destination_id,
+                last.arrival_time + min_connection,
+                last.arrival_time + max_connection,
+            ):
+                if leg.destination_id not in visited:
+                    extended = legs + (leg,)
+                    heapq.heappush(queue, (key(extended), next(counter), extended))
+
+        return itineraries
+
+
+flight_index = FlightIndex()
@@ -0,0 +1,99 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from airport.benchmark import run_benchmark, seed
+from airport.models import Flight
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a separate benchmark database, measure query counts, latency "
+        "and serialization time of every airport API endpoint and write a "
+        "JSON report. Fails when an endpoint exceeds its query budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--airports", type=int, default=2000)
+        parser.add_argument("--routes", type=int, default=10000)
+        parser.add_argument("--flights", type=int, default=100000)
+        parser.add_argument("--tickets-per-flight", type=int, default=10)
+        parser.add_argument("--requests", type=int, default=20)
+        parser.add_argument("--output", help="Write the report to this file.")
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the benchmark database and reuse its data next time.",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.settings_dict["TEST"]["NAME"] = f"benchmark_{old_name}"
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False, keepdb=options["keepdb"]
+        )
+
+        try:
+            seeding = 0.0
+            if not Flight.objects.exists():
+                self.stdout.write("Seeding benchmark database")
+                started = time.monotonic()
+                seed(
+                    airports=options["airports"],
+                    routes=options["routes"],
+                    flights=options["flights"],
+                    tickets_per_flight=options["tickets_per_flight"],
+                )
+                seeding = time.monotonic() - started
+
+            # Orders and tickets are listed per user, so measure a customer's.
+            user = (
+                get_user_model()
+                .objects.filter(orders__isnull=False)
+                .order_by("id")
+                .first()
+            )
+            if user is None:
+                raise CommandError("Seed orders with --tickets-per-flight > 0.")
+            staff, _ = get_user_model().objects.get_or_create(
+                email="benchmark@example.com", defaults={"is_staff": True}
+            )
+            endpoints = run_benchmark(user, staff, requests=options["requests"])
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+            teardown_test_environment()
+
+        report = json.dumps(
+            {
+                "volumes": {
+                    "airports": options["airports"],
+                    "routes": options["routes"],
+                    "flights": options["flights"],
+                    "tickets": options["flights"] * options["tickets_per_flight"],
+                },
+                "requests": options["requests"],
+                "seeding_seconds": round(seeding, 1),
+                "endpoints": endpoints,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(report)
+        else:
+            self.stdout.write(report)
+
+        over_budget = [
+            name
+            for name, result in endpoints.items()
+            if result["queries"] > result["max_queries"]
+        ]
+        if over_budget:
+            raise CommandError(f"Query budget exceeded by: {', '.join(over_budget)}")
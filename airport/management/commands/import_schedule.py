@@ -0,0 +1,304 @@
+import csv
+import itertools
+import json
+import time
+from pathlib import Path
+
+from django.core.management import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from airport.cache import invalidate
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    FlightCrew,
+    Route,
+)
+
+FIELDS = (
+    "source",
+    "source_city",
+    "destination",
+    "destination_city",
+    "distance",
+    "airplane",
+    "airplane_type",
+    "rows",
+    "seats_in_row",
+    "departure_time",
+    "arrival_time",
+)
+
+
+def parse_time(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid date and time: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_row(row):
+    missing = [field for field in FIELDS if not row.get(field)]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+
+    crew = row.get("crew") or []
+    if isinstance(crew, str):
+        crew = crew.split(";")
+    crew = [tuple(member.split(maxsplit=1)) for member in crew if member.strip()]
+    if any(len(member) != 2 for member in crew):
+        raise ValueError("Crew members need a first and a last name.")
+
+    departure_time = parse_time(row["departure_time"])
+    arrival_time = parse_time(row["arrival_time"])
+    if arrival_time <= departure_time:
+        raise ValueError("Arrival time must be after departure time.")
+
+    return {
+        "source": (row["source"], row["source_city"]),
+        "destination": (row["destination"], row["destination_city"]),
+        "distance": int(row["distance"]),
+        "airplane": row["airplane"],
+        "airplane_type": row["airplane_type"],
+        "rows": int(row["rows"]),
+        "seats_in_row": int(row["seats_in_row"]),
+        "departure_time": departure_time,
+        "arrival_time": arrival_time,
+        "crew": crew,
+    }
+
+
+def read_jsonl(file):
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            raise CommandError(f"Invalid JSON on line {number}: {error}")
+        if not isinstance(row, dict):
+            raise CommandError(f"Invalid row on line {number}: not a JSON object.")
+        yield row
+
+
+class Command(BaseCommand):
+    help = (
+        "Import flights with their airports, routes, airplanes and crew "
+        "from a CSV or JSONL file. Crew members are written as "
+        '"First Last" separated by ";" (or as a JSON list).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=("csv", "jsonl"))
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in ("csv", "jsonl"):
+            raise CommandError("Use a .csv or .jsonl file or pass --format.")
+
+        self.load_lookups()
+
+        imported = 0
+        started = time.monotonic()
+        with path.open(newline="", encoding="utf-8") as file:
+            if file_format == "csv":
+                rows = csv.DictReader(file)
+            else:
+                rows = read_jsonl(file)
+
+            while chunk := list(itertools.islice(rows, options["chunk_size"])):
+                try:
+                    parsed = [parse_row(row) for row in chunk]
+                except (ValueError, TypeError) as error:
+                    raise CommandError(
+                        f"Invalid row after {imported} imported rows: {error}"
+                    )
+
+                try:
+                    with transaction.atomic():
+                        self.import_rows(parsed)
+                except IntegrityError as error:
+                    raise CommandError(
+                        f"Schedule conflict after {imported} imported rows: {error}"
+                    )
+
+                imported += len(chunk)
+                if options["verbosity"] > 1:
+                    self.stdout.write(
+                        f"{imported} rows "
+                        f"({imported / (time.monotonic() - started):.0f} rows/sec)"
+                    )
+
+        invalidate(Airport, Route, Crew, AirplaneType, Airplane)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} rows in {elapsed:.1f}s "
+                f"({imported / elapsed if elapsed else imported:.0f} rows/sec)"
+            )
+        )
+
+    def load_lookups(self):
+        self.airports = {
+            (name, city): pk
+            for pk, name, city in Airport.objects.values_list(
+                "id", "name", "closest_big_city"
+            )
+        }
+        self.routes = {
+            (source_id, destination_id): pk
+            for pk, source_id, destination_id in Route.objects.values_list(
+                "id", "source_id", "destination_id"
+            )
+        }
+        self.airplane_types = dict(
+            AirplaneType.objects.values_list("name", "id").order_by("-id")
+        )
+        self.airplanes = dict(
+            Airplane.objects.values_list("name", "id").order_by("-id")
+        )
+        self.crew = {
+            (first_name, last_name): pk
+            for pk, first_name, last_name in Crew.objects.values_list(
+                "id", "first_name", "last_name"
+            )
+        }
+
+    @staticmethod
+    def create_missing(model, lookup, objects):
+        """Insert the objects whose keys are not in the lookup yet."""
+        missing = {key: obj for key, obj in objects.items() if key not in lookup}
+        if missing:
+            created = model.objects.bulk_create(missing.values())
+            for key, obj in zip(missing, created):
+                lookup[key] = obj.id
+
+    def import_rows(self, rows):
+        self.create_missing(
+            Airport,
+            self.airports,
+            {
+                key: Airport(name=key[0], closest_big_city=key[1])
+                for row in rows
+                for key in (row["source"], row["destination"])
+            },
+        )
+        self.create_missing(
+            Route,
+            self.routes,
+            {
+                (self.airports[row["source"]], self.airports[row["destination"]]): (
+                    Route(
+                        source_id=self.airports[row["source"]],
+                        destination_id=self.airports[row["destination"]],
+                        distance=row["distance"],
+                    )
+                )
+                for row in rows
+            },
+        )
+        self.create_missing(
+            AirplaneType,
+            self.airplane_types,
+            {
+                row["airplane_type"]: AirplaneType(name=row["airplane_type"])
+                for row in rows
+            },
+        )
+        self.create_missing(
+            Airplane,
+            self.airplanes,
+            {
+                row["airplane"]: Airplane(
+                    name=row["airplane"],
+                    rows=row["rows"],
+                    seats_in_row=row["seats_in_row"],
+                    airplane_type_id=self.airplane_types[row["airplane_type"]],
+                )
+                for row in rows
+            },
+        )
+        self.create_missing(
+            Crew,
+            self.crew,
+            {
+                member: Crew(first_name=member[0], last_name=member[1])
+                for row in rows
+                for member in row["crew"]
+            },
+        )
+
+        # The last row wins when a chunk repeats an airplane departure.
+        flights = {
+            (self.airplanes[row["airplane"]], row["departure_time"]): row
+            for row in rows
+        }
+        created = Flight.objects.bulk_create(
+            [
+                Flight(
+                    route_id=self.routes[
+                        (
+                            self.airports[row["source"]],
+                            self.airports[row["destination"]],
+                        )
+                    ],
+                    airplane_id=airplane_id,
+                    departure_time=departure_time,
+                    arrival_time=row["arrival_time"],
+                )
+                for (airplane_id, departure_time), row in flights.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["airplane", "departure_time"],
+            update_fields=["route", "arrival_time"],
+        )
+
+        roster = {
+            (flight.id, self.crew[member])
+            for flight, row in zip(created, flights.values())
+            for member in row["crew"]
+        }
+        # Drop crew no longer on the row before the others are rescheduled.
+        assignments = FlightCrew.objects.filter(flight__in=created)
+        FlightCrew.objects.filter(
+            id__in=[
+                assignment_id
+                for assignment_id, *key in assignments.values_list(
+                    "id", "flight_id", "crew_id"
+                )
+                if tuple(key) not in roster
+            ]
+        ).delete()
+        # Updated flights may have a new arrival time for their crew.
+        assignments.update(
+            arrival_time=Subquery(
+                Flight.objects.filter(id=OuterRef("flight")).values("arrival_time")
+            )
+        )
+        # Not ignore_conflicts, which would also skip crew overlaps.
+        assigned = set(assignments.values_list("flight_id", "crew_id"))
+        FlightCrew.objects.bulk_create(
+            [
+                FlightCrew(
+                    flight_id=flight.id,
+                    crew_id=self.crew[member],
+                    departure_time=flight.departure_time,
+                    arrival_time=flight.arrival_time,
+                )
+                for flight, row in zip(created, flights.values())
+                for member in dict.fromkeys(row["crew"])
+                if (flight.id, self.crew[member]) not in assigned
+            ]
+        )
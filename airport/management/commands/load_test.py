@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+from django.core.management import BaseCommand
+
+from airport.benchmark import load_test
+
+
+class Command(BaseCommand):
+    help = (
+        "Send GET requests to a running server over many concurrent "
+        "connections and report throughput, latency and failed requests. "
+        "Add slow clients and run it against the WSGI and the ASGI server "
+        "to compare how many connections one process keeps serving."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url")
+        parser.add_argument("--concurrency", type=int, default=200)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--token", help="JWT access token to send.")
+        parser.add_argument(
+            "--slow-clients",
+            type=int,
+            default=0,
+            help="Extra connections that send their request slowly.",
+        )
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=5,
+            help="Seconds a slow client takes to send its request.",
+        )
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options["token"]:
+            headers["Authorization"] = f"Bearer {options['token']}"
+
+        report = asyncio.run(
+            load_test(
+                options["url"],
+                concurrency=options["concurrency"],
+                requests=options["requests"],
+                headers=headers,
+                timeout=options["timeout"],
+                slow_clients=options["slow_clients"],
+                delay=options["delay"],
+            )
+        )
+        self.stdout.write(json.dumps(report, indent=2))
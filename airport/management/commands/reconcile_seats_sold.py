@@ -0,0 +1,65 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from airport.models import Flight, Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the tickets of every flight and fix the seats_sold "
+        "counters that drifted, e.g. after writes that bypassed the ORM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the flights whose counter is wrong.",
+        )
+
+    def handle(self, *args, **options):
+        tickets = (
+            Ticket.objects.filter(flight=OuterRef("pk"))
+            .order_by()
+            .values("flight")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+
+        checked = fixed = 0
+        last_id = 0
+        while batch := list(
+            Flight.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[: options["batch_size"]]
+        ):
+            last_id = batch[-1]
+            checked += len(batch)
+
+            with transaction.atomic():
+                drifted = (
+                    Flight.objects.filter(id__in=batch)
+                    .select_for_update()
+                    .annotate(actual=Coalesce(Subquery(tickets), 0))
+                    .exclude(seats_sold=F("actual"))
+                )
+                for flight_id, seats_sold, actual in drifted.values_list(
+                    "id", "seats_sold", "actual"
+                ):
+                    fixed += 1
+                    if options["verbosity"] > 1:
+                        self.stdout.write(
+                            f"Flight {flight_id}: {seats_sold} -> {actual}"
+                        )
+                    if not options["dry_run"]:
+                        Flight.objects.filter(id=flight_id).update(seats_sold=actual)
+
+        action = "Found" if options["dry_run"] else "Fixed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {checked} flights. {action} {fixed} wrong counters."
+            )
+        )
@@ -0,0 +1,40 @@
+from datetime import date, timedelta
+
+from django.core.management import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+
+from airport.analytics import refresh_daily_sales, summarized_until
+from airport.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize the orders and tickets of every finished day into the "
+        "DailySales table read by the sales report. Run it periodically, "
+        "e.g. every night."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="Recount the days from this date (YYYY-MM-DD). Defaults to "
+            "the last summarized day, or the first order on the first run.",
+        )
+
+    def handle(self, *args, **options):
+        first_day = options["since"]
+        if first_day is None:
+            until = summarized_until()
+            if until is not None:
+                first_day = until - timedelta(days=1)
+            elif first_order := Order.objects.aggregate(at=Min("created_at"))["at"]:
+                first_day = timezone.localdate(first_order)
+        last_day = timezone.localdate() - timedelta(days=1)
+
+        days = 0
+        if first_day is not None and first_day <= last_day:
+            days = refresh_daily_sales(first_day, last_day)
+
+        self.stdout.write(self.style.SUCCESS(f"Summarized {days} days."))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="ticket",
+            constraint=models.UniqueConstraint(
+                fields=("flight", "row", "seat"),
+                name="unique_ticket_seat",
+                violation_error_message="This seat is already taken on this flight.",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0003_flight_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="flight",
+            constraint=models.UniqueConstraint(
+                fields=("airplane", "departure_time"),
+                name="unique_airplane_departure_time",
+            ),
+        ),
+    ]
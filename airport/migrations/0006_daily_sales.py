@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0005_flight_seats_sold"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(unique=True)),
+                ("orders", models.PositiveIntegerField()),
+                ("tickets", models.PositiveIntegerField()),
+                ("passenger_km", models.BigIntegerField()),
+            ],
+            options={
+                "verbose_name_plural": "Daily sales",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["created_at"], name="airport_ord_created_ff47a7_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,134 @@
+import django.contrib.postgres.constraints
+import django.db.models.deletion
+from django.db import migrations, models
+
+import airport.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0006_daily_sales"),
+    ]
+
+    operations = [
+        # Turn the auto-created crew table into the FlightCrew model in
+        # place, so existing crew assignments are kept.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="FlightCrew",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "crew",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="flight_assignments",
+                                to="airport.crew",
+                            ),
+                        ),
+                        (
+                            "flight",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="crew_assignments",
+                                to="airport.flight",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "db_table": "airport_flight_crew",
+                        "unique_together": {("flight", "crew")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="flight",
+                    name="crew",
+                    field=models.ManyToManyField(
+                        related_name="flights",
+                        through="airport.FlightCrew",
+                        to="airport.crew",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="flightcrew",
+            name="departure_time",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="flightcrew",
+            name="arrival_time",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE airport_flight_crew
+            SET departure_time = airport_flight.departure_time,
+                arrival_time = airport_flight.arrival_time
+            FROM airport_flight
+            WHERE airport_flight.id = airport_flight_crew.flight_id
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name="flightcrew",
+            name="departure_time",
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name="flightcrew",
+            name="arrival_time",
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name="flight",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                expressions=[
+                    (
+                        airport.models.TsTzRange("departure_time", "arrival_time"),
+                        "&&",
+                    ),
+                    (
+                        airport.models.Int8Range(
+                            "airplane", "airplane", models.Value("[]")
+                        ),
+                        "&&",
+                    ),
+                ],
+                name="exclude_overlapping_airplane_flights",
+                violation_error_message=(
+                    "The airplane is already scheduled on an overlapping flight."
+                ),
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="flightcrew",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                expressions=[
+                    (
+                        airport.models.TsTzRange("departure_time", "arrival_time"),
+                        "&&",
+                    ),
+                    (
+                        airport.models.Int8Range("crew", "crew", models.Value("[]")),
+                        "&&",
+                    ),
+                ],
+                name="exclude_overlapping_crew_flights",
+                violation_error_message=(
+                    "The crew member is already scheduled on an overlapping flight."
+                ),
+            ),
+        ),
+    ]
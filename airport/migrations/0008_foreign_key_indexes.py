@@ -0,0 +1,105 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes to the tickets and orders.
+    atomic = False
+
+    dependencies = [
+        ("airport", "0007_schedule_overlap"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="flight",
+            index=models.Index(
+                fields=["route", "departure_time"],
+                name="airport_fli_route_i_baa295_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "-created_at"], name="airport_ord_user_id_5a658c_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="ticket",
+            index=models.Index(
+                fields=["order", "id"],
+                include=("flight", "row", "seat"),
+                name="airport_ticket_order_covering",
+            ),
+        ),
+        # The indexes above start with these foreign keys, so their own
+        # indexes go. AlterField would also drop and re-validate the foreign
+        # key constraints, so the indexes are dropped by hand.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="flight",
+                    name="route",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="flights",
+                        to="airport.route",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="order",
+                    name="user",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="orders",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="ticket",
+                    name="flight",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tickets",
+                        to="airport.flight",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="ticket",
+                    name="order",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tickets",
+                        to="airport.order",
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "airport_flight_route_id_843e2a13"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY "airport_flight_route_id_843e2a13" ON "airport_flight" ("route_id")',
+                ),
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "airport_order_user_id_95cfc612"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY "airport_order_user_id_95cfc612" ON "airport_order" ("user_id")',
+                ),
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "airport_ticket_flight_id_4206f7bf"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY "airport_ticket_flight_id_4206f7bf" ON "airport_ticket" ("flight_id")',
+                ),
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "airport_ticket_order_id_4057332b"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY "airport_ticket_order_id_4057332b" ON "airport_ticket" ("order_id")',
+                ),
+            ],
+        ),
+    ]
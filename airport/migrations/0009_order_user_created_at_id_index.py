@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:53
+
+from django.conf import settings
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Swap the indexes without locking writes to the orders.
+    atomic = False
+
+    dependencies = [
+        ("airport", "0008_foreign_key_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Order history pages on (-created_at, -id), so the index ends with
+        # the id tiebreaker and no sort is left over.
+        AddIndexConcurrently(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="airport_ord_user_id_f7a400_idx",
+            ),
+        ),
+        RemoveIndexConcurrently(
+            model_name="order",
+            name="airport_ord_user_id_5a658c_idx",
+        ),
+    ]
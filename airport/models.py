@@ -1,6 +1,38 @@
 from django.conf import settings
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import (
+    BigIntegerRangeField,
+    DateTimeRangeField,
+    RangeOperators,
+)
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Greatest
+
+
+class TsTzRange(models.Func):
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
+
+class Int8Range(models.Func):
+    function = "INT8RANGE"
+    output_field = BigIntegerRangeField()
+
+
+def timespan():
+    """The [departure_time, arrival_time) range the schedule constraints compare."""
+    return TsTzRange("departure_time", "arrival_time")
+
+
+def id_range(field):
+    """
+    A range holding only the id in `field`.
+
+    Two of them overlap when the ids are equal, which GiST indexes support
+    without the btree_gist extension.
+    """
+    return Int8Range(field, field, models.Value("[]"))
 
 
 class Airport(models.Model):
@@ -10,6 +42,9 @@ class Airport(models.Model):
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [models.Index(fields=["closest_big_city"])]
+
 
 class Route(models.Model):
     source = models.ForeignKey(
@@ -27,6 +62,9 @@ class Route(models.Model):
     def __str__(self):
         return f"{self.source} ➝ {self.destination}"
 
+    class Meta:
+        indexes = [models.Index(fields=["source", "destination"])]
+
 
 class Crew(models.Model):
     first_name = models.CharField(max_length=255)
@@ -69,13 +107,64 @@ class Airplane(models.Model):
 
 
 class Flight(models.Model):
-    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="flights")
+    # Indexed by (route, departure_time) in Meta.indexes.
+    route = models.ForeignKey(
+        Route, on_delete=models.CASCADE, related_name="flights", db_index=False
+    )
     airplane = models.ForeignKey(
         Airplane, on_delete=models.CASCADE, related_name="flights"
     )
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
-    crew = models.ManyToManyField(Crew, related_name="flights")
+    crew = models.ManyToManyField(Crew, related_name="flights", through="FlightCrew")
+    # Number of tickets of the flight, kept up to date with every ticket
+    # write. `python manage.py reconcile_seats_sold` recounts it.
+    seats_sold = models.PositiveIntegerField(default=0, editable=False)
+
+    @classmethod
+    def add_seats_sold(cls, counts):
+        """
+        Add ticket counts keyed by flight id, locking flights in id order.
+
+        Counters never drop below 0, so a drifted counter is left for
+        reconcile_seats_sold instead of failing the delete of a ticket.
+        """
+        for flight_id, count in sorted(counts.items()):
+            if count:
+                cls.objects.filter(id=flight_id).update(
+                    seats_sold=Greatest(models.F("seats_sold") + count, 0)
+                )
+
+    def save(self, *args, **kwargs):
+        # seats_sold only changes through add_seats_sold(), so that saving a
+        # stale instance never overwrites concurrent ticket writes.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "seats_sold"
+            ]
+
+        update_fields = kwargs.get("update_fields") or ()
+        if not {"departure_time", "arrival_time"} & set(update_fields):
+            super().save(*args, **kwargs)
+            return
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.crew_assignments.update(
+                departure_time=self.departure_time, arrival_time=self.arrival_time
+            )
+
+    def set_crew(self, crew):
+        """Assign the crew members, copying the flight times to the assignments."""
+        self.crew.set(
+            crew,
+            through_defaults={
+                "departure_time": self.departure_time,
+                "arrival_time": self.arrival_time,
+            },
+        )
 
     def clean(self):
         if self.arrival_time <= self.departure_time:
@@ -84,40 +173,185 @@ class Flight(models.Model):
     def __str__(self):
         return f"{self.route}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["departure_time"]),
+            models.Index(fields=["route", "departure_time"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["airplane", "departure_time"],
+                name="unique_airplane_departure_time",
+            ),
+            ExclusionConstraint(
+                name="exclude_overlapping_airplane_flights",
+                expressions=[
+                    (timespan(), RangeOperators.OVERLAPS),
+                    (id_range("airplane"), RangeOperators.OVERLAPS),
+                ],
+                violation_error_message=(
+                    "The airplane is already scheduled on an overlapping flight."
+                ),
+            ),
+        ]
+
+
+class FlightCrewQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Copy the flight times to assignments created without them, so that
+        `flight.crew.add()` and `crew.flights.add()` need no through_defaults.
+        """
+        objs = list(objs)
+        missing = [
+            obj
+            for obj in objs
+            if obj.departure_time is None or obj.arrival_time is None
+        ]
+        times = {
+            flight.id: (flight.departure_time, flight.arrival_time)
+            for flight in Flight.objects.using(self.db)
+            .filter(id__in={obj.flight_id for obj in missing})
+            .only("departure_time", "arrival_time")
+        }
+        for obj in missing:
+            obj.departure_time, obj.arrival_time = times[obj.flight_id]
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class FlightCrew(models.Model):
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="crew_assignments"
+    )
+    crew = models.ForeignKey(
+        Crew, on_delete=models.CASCADE, related_name="flight_assignments"
+    )
+    # Copies of the flight times for the exclusion constraint, which can
+    # only compare columns of one table. save(), bulk_create() and
+    # Flight.save() keep them in sync.
+    departure_time = models.DateTimeField(editable=False)
+    arrival_time = models.DateTimeField(editable=False)
+
+    objects = FlightCrewQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.departure_time = self.flight.departure_time
+        self.arrival_time = self.flight.arrival_time
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.crew} on {self.flight}"
+
+    class Meta:
+        db_table = "airport_flight_crew"
+        unique_together = [("flight", "crew")]
+        constraints = [
+            ExclusionConstraint(
+                name="exclude_overlapping_crew_flights",
+                expressions=[
+                    (timespan(), RangeOperators.OVERLAPS),
+                    (id_range("crew"), RangeOperators.OVERLAPS),
+                ],
+                violation_error_message=(
+                    "The crew member is already scheduled on an overlapping flight."
+                ),
+            )
+        ]
+
 
 class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
+    # Indexed by (user, -created_at, -id) in Meta.indexes.
     user = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="orders"
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="orders",
+        db_index=False,
     )
 
     def __str__(self):
         return f"Order #{self.id} by {self.user.username} at {self.created_at.strftime('%Y-%m-%d %H:%M')}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["user", "-created_at", "-id"]),
+        ]
+
 
 class Ticket(models.Model):
     row = models.IntegerField()
     seat = models.IntegerField()
-    flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name="tickets")
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="tickets")
+    # Indexed by the unique seat constraint and the covering order index.
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="tickets", db_index=False
+    )
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name="tickets", db_index=False
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        ticket = super().from_db(db, field_names, values)
+        ticket._loaded_flight_id = ticket.__dict__.get("flight_id")
+        return ticket
+
+    def save(self, *args, **kwargs):
+        """Save the ticket and move it between the seats_sold of flights."""
+        counts = {}
+        if self._state.adding:
+            counts[self.flight_id] = 1
+        elif getattr(self, "_loaded_flight_id", self.flight_id) != self.flight_id:
+            counts = {self._loaded_flight_id: -1, self.flight_id: 1}
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Flight.add_seats_sold(counts)
+        self._loaded_flight_id = self.flight_id
+
+    @staticmethod
+    def validate_seat(row, seat, airplane, error_to_raise):
+        if not (1 <= row <= airplane.rows):
+            raise error_to_raise(f"Row must be between 1 and {airplane.rows}.")
+        if not (1 <= seat <= airplane.seats_in_row):
+            raise error_to_raise(f"Seat must be between 1 and {airplane.seats_in_row}.")
 
     def clean(self):
         super().clean()
 
-        airplane = self.flight.airplane
-        if not (1 <= self.row <= airplane.rows):
-            raise ValidationError(f"Row must be between 1 and {airplane.rows}.")
-        if not (1 <= self.seat <= airplane.seats_in_row):
-            raise ValidationError(
-                f"Seat must be between 1 and {airplane.seats_in_row}."
+        Ticket.validate_seat(self.row, self.seat, self.flight.airplane, ValidationError)
+
+    def __str__(self):
+        return f"Ticket: Row {self.row}, Seat {self.seat}, Flight {self.flight}"
+
+    class Meta:
+        indexes = [
+            # Covers the tickets of orders, so listing them reads the index only.
+            models.Index(
+                fields=["order", "id"],
+                include=["flight", "row", "seat"],
+                name="airport_ticket_order_covering",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["flight", "row", "seat"],
+                name="unique_ticket_seat",
+                violation_error_message="This seat is already taken on this flight.",
             )
+        ]
 
-        if (
-            Ticket.objects.filter(flight=self.flight, row=self.row, seat=self.seat)
-            .exclude(pk=self.pk)
-            .exists()
-        ):
-            raise ValidationError("This seat is already taken on this flight.")
+
+class DailySales(models.Model):
+    """Orders and tickets sold per day, filled by `manage.py refresh_sales`."""
+
+    day = models.DateField(unique=True)
+    orders = models.PositiveIntegerField()
+    tickets = models.PositiveIntegerField()
+    passenger_km = models.BigIntegerField()
 
     def __str__(self):
-        return f"Ticket: Row {self.row}, Seat {self.seat}, Flight {self.flight}"
+        return f"Sales of {self.day}"
+
+    class Meta:
+        verbose_name_plural = "Daily sales"
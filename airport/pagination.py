@@ -0,0 +1,105 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+
+
+class CursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination over every ordering field.
+
+    The ordering always ends with `id`, and a cursor position holds the
+    values of all the ordering fields of a row. Pages start strictly after
+    that row, so rows that tie on the requested ordering never fall back
+    to offsets.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "id"
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if any(field.lstrip("-") in ("id", "pk") for field in ordering):
+            return ordering
+        return (*ordering, "-id" if ordering[0].startswith("-") else "id")
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is not None and cursor.position is not None:
+            try:
+                position = json.loads(cursor.position)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return super().paginate_queryset(_KeysetQuerySet(queryset, self), request, view)
+
+    def keyset_filter(self, position, reverse):
+        """Match the rows after the position in the (maybe reversed) ordering."""
+        values = json.loads(position)
+        after = Q()
+        for index, (order, value) in enumerate(zip(self.ordering, values)):
+            attr = order.lstrip("-")
+            lookup = "lt" if reverse != order.startswith("-") else "gt"
+            equal = {
+                field.lstrip("-"): previous
+                for field, previous in zip(self.ordering[:index], values)
+            }
+            after |= Q(**equal, **{f"{attr}__{lookup}": value})
+        # The bound on the first field alone lets an index range scan start.
+        first = self.ordering[0].lstrip("-")
+        lookup = "lte" if reverse != self.ordering[0].startswith("-") else "gte"
+        return Q(**{f"{first}__{lookup}": values[0]}) & after
+
+    def _get_position_from_instance(self, instance, ordering):
+        """Follow related lookups such as `route__source__name` as well."""
+        position = []
+        for order in ordering:
+            field_name = order.lstrip("-")
+            if isinstance(instance, dict):
+                value = instance[field_name]
+            else:
+                value = instance
+                for attr in field_name.split("__"):
+                    value = getattr(value, attr)
+            position.append(str(value))
+        return json.dumps(position)
+
+
+class _KeysetQuerySet:
+    """
+    Stand in for the queryset DRF paginates, turning its single field
+    position filter into the keyset filter over every ordering field.
+    """
+
+    def __init__(self, queryset, paginator):
+        self.queryset = queryset
+        self.paginator = paginator
+
+    def order_by(self, *ordering):
+        return _KeysetQuerySet(self.queryset.order_by(*ordering), self.paginator)
+
+    def filter(self, **kwargs):
+        (position,) = kwargs.values()
+        keyset = self.paginator.keyset_filter(position, self.paginator.cursor.reverse)
+        try:
+            return self.queryset.filter(keyset)
+        except (ValueError, ValidationError):
+            raise NotFound(self.paginator.invalid_cursor_message)
+
+    def __getitem__(self, key):
+        return self.queryset[key]
+
+
+class FlightPagination(CursorPagination):
+    ordering = ("departure_time", "id")
+
+
+class OrderPagination(CursorPagination):
+    ordering = ("-created_at", "-id")
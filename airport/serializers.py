@@ -1,7 +1,18 @@
-from django.db import transaction
+import operator
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import reduce
+
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from airport.cache import invalidate
+from airport.exceptions import ScheduleConflict, SeatTaken
+from airport.holds import seat_holds
+from airport.itineraries import flight_index
 from airport.models import (
     Airport,
     Route,
@@ -9,15 +20,221 @@ from airport.models import (
     AirplaneType,
     Airplane,
     Flight,
+    FlightCrew,
     Order,
     Ticket,
 )
 
+SCHEDULE_CONSTRAINTS = {
+    constraint.name: constraint.violation_error_message
+    for model in (Flight, FlightCrew)
+    for constraint in model._meta.constraints
+    if constraint.name.startswith("exclude_overlapping")
+}
+SCHEDULE_CONSTRAINTS["unique_airplane_departure_time"] = (
+    "The airplane already has a flight departing at this time."
+)
+
+
+@contextmanager
+def booking_seats():
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as error:
+        diag = getattr(error.__cause__, "diag", None)
+        if getattr(diag, "constraint_name", None) != "unique_ticket_seat":
+            raise
+        raise SeatTaken() from error
+
+
+@contextmanager
+def scheduling_flights():
+    """Turn overlaps caught by the schedule exclusion constraints into a 409."""
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as error:
+        diag = getattr(error.__cause__, "diag", None)
+        constraint_name = getattr(diag, "constraint_name", None)
+        if constraint_name not in SCHEDULE_CONSTRAINTS:
+            raise
+        raise ScheduleConflict(SCHEDULE_CONSTRAINTS[constraint_name]) from error
+
+
+def save_changed(instance, data):
+    """Assign the data to the instance and save only the fields that changed."""
+    changed = [attr for attr, value in data.items() if getattr(instance, attr) != value]
+    for attr in changed:
+        setattr(instance, attr, data[attr])
+    if changed:
+        instance.save(update_fields=changed)
+
+
+def get_or_create_all(model, fields, items):
+    """
+    Resolve objects by the values of `fields` in one query and insert the
+    missing ones at once. Return them keyed by those values, in the order
+    of `items`.
+    """
+    keys = list(dict.fromkeys(tuple(item[field] for field in fields) for item in items))
+    if not keys:
+        return {}
+
+    found = {
+        tuple(getattr(obj, field) for field in fields): obj
+        for obj in model.objects.filter(
+            reduce(operator.or_, (Q(**dict(zip(fields, key))) for key in keys))
+        )
+    }
+    missing = [model(**dict(zip(fields, key))) for key in keys if key not in found]
+    if missing:
+        for obj in model.objects.bulk_create(missing):
+            found[tuple(getattr(obj, field) for field in fields)] = obj
+        invalidate(model)
+
+    return {key: found[key] for key in keys}
+
+
+def get_or_create_crew(crew_data):
+    """Resolve crew members by name in one query and insert the missing at once."""
+    return list(
+        get_or_create_all(Crew, ("first_name", "last_name"), crew_data).values()
+    )
+
+
+SKIPPED = object()
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Create or update a batch of objects with bulk_create() and bulk_update().
+
+    Items are validated one by one: invalid items are left out of the batch
+    and reported in `item_errors` by their index instead of failing it.
+    Updates expect the list of instances as `instance` and an `id` in every
+    item. Nested objects named in `nested_lookups` are matched by those
+    fields, or created, with one query per related model for the whole
+    batch.
+    """
+
+    # Nested field -> fields of the related model it is matched by.
+    nested_lookups = {}
+
+    def to_internal_value(self, data):
+        self.item_errors = []
+        self._index = -1
+        if self.instance is not None:
+            self._instances = {instance.id: instance for instance in self.instance}
+        items = super().to_internal_value(data)
+        return [item for item in items if item is not SKIPPED]
+
+    def run_child_validation(self, data):
+        self._index += 1
+        try:
+            if self.instance is None:
+                return super().run_child_validation(data)
+
+            pk = data.get("id") if isinstance(data, dict) else None
+            self.child.instance = self._instances.get(pk)
+            if self.child.instance is None:
+                raise ValidationError({"id": ["No object with this id."]})
+            item = super().run_child_validation(data)
+            for field, lookup in self.nested_lookups.items():
+                if field in item and set(lookup) - set(item[field]):
+                    raise ValidationError(
+                        {field: [f"Give all of {', '.join(lookup)}."]}
+                    )
+            return {**item, "id": pk}
+        except ValidationError as error:
+            self.item_errors.append({"index": self._index, "errors": error.detail})
+            return SKIPPED
+        finally:
+            self.child.instance = None
+
+    def resolve_nested(self, validated_data):
+        """Replace the nested data of every item with model instances."""
+        model = self.child.Meta.model
+        by_model = defaultdict(list)
+        for field, lookup in self.nested_lookups.items():
+            related_model = model._meta.get_field(field).related_model
+            by_model[related_model, lookup].append(field)
+
+        for (related_model, lookup), fields in by_model.items():
+            objects = get_or_create_all(
+                related_model,
+                lookup,
+                [
+                    item[field]
+                    for item in validated_data
+                    for field in fields
+                    if item.get(field)
+                ],
+            )
+            for item in validated_data:
+                for field in fields:
+                    if item.get(field):
+                        item[field] = objects[
+                            tuple(item[field][name] for name in lookup)
+                        ]
+
+    @transaction.atomic
+    def create(self, validated_data):
+        self.resolve_nested(validated_data)
+        model = self.child.Meta.model
+        return model.objects.bulk_create([model(**item) for item in validated_data])
+
+    @transaction.atomic
+    def update(self, instances, validated_data):
+        self.resolve_nested(validated_data)
+        by_id = {instance.id: instance for instance in instances}
+        updated = []
+        fields = set()
+        for item in validated_data:
+            instance = by_id[item.pop("id")]
+            for attr, value in item.items():
+                setattr(instance, attr, value)
+            fields.update(item)
+            updated.append(instance)
+
+        if updated and fields:
+            self.child.Meta.model.objects.bulk_update(updated, list(fields))
+        return updated
+
+
+class RouteListSerializer(BulkListSerializer):
+    nested_lookups = {
+        "source": ("name", "closest_big_city"),
+        "destination": ("name", "closest_big_city"),
+    }
+
+    @staticmethod
+    def update_flight_index(routes):
+        # bulk_create() and bulk_update() send no signals.
+        transaction.on_commit(
+            lambda: [flight_index.update_route(route) for route in routes]
+        )
+
+    def create(self, validated_data):
+        routes = super().create(validated_data)
+        self.update_flight_index(routes)
+        return routes
+
+    def update(self, instances, validated_data):
+        routes = super().update(instances, validated_data)
+        self.update_flight_index(routes)
+        return routes
+
+
+class AirplaneListSerializer(BulkListSerializer):
+    nested_lookups = {"airplane_type": ("name",)}
+
 
 class AirportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Airport
         fields = ("id", "name", "closest_big_city")
+        list_serializer_class = BulkListSerializer
 
 
 class RouteSerializer(serializers.ModelSerializer):
@@ -27,17 +244,21 @@ class RouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
         fields = ("id", "source", "destination", "distance")
+        list_serializer_class = RouteListSerializer
 
     @transaction.atomic
     def create(self, validated_data):
         source_data = validated_data.pop("source", None)
         destination_data = validated_data.pop("destination", None)
 
-        source_airport, _ = Airport.objects.get_or_create(**source_data)
-        destination_airport, _ = Airport.objects.get_or_create(**destination_data)
+        lookup = RouteListSerializer.nested_lookups["source"]
+        airports = get_or_create_all(Airport, lookup, [source_data, destination_data])
+        key = operator.itemgetter(*lookup)
 
         route = Route.objects.create(
-            source=source_airport, destination=destination_airport, **validated_data
+            source=airports[key(source_data)],
+            destination=airports[key(destination_data)],
+            **validated_data,
         )
 
         return route
@@ -66,6 +287,16 @@ class CrewSerializer(serializers.ModelSerializer):
         fields = ("id", "first_name", "last_name")
 
 
+class CrewAvailabilityQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+    def validate(self, attrs):
+        if attrs["start"] >= attrs["end"]:
+            raise ValidationError("start must be before end.")
+        return attrs
+
+
 class AirplaneTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = AirplaneType
@@ -78,6 +309,7 @@ class AirplaneSerializer(serializers.ModelSerializer):
     class Meta:
         model = Airplane
         fields = ("id", "name", "rows", "seats_in_row", "airplane_type")
+        list_serializer_class = AirplaneListSerializer
 
     @transaction.atomic
     def create(self, validated_data):
@@ -111,72 +343,281 @@ class FlightSerializer(serializers.ModelSerializer):
     class Meta:
         model = Flight
         fields = ("id", "route", "airplane", "departure_time", "arrival_time", "crew")
+        # The nested airplane is only resolved to a model instance in create().
+        validators = []
 
-    @transaction.atomic
+    def validate(self, attrs):
+        departure_time = attrs.get(
+            "departure_time", getattr(self.instance, "departure_time", None)
+        )
+        arrival_time = attrs.get(
+            "arrival_time", getattr(self.instance, "arrival_time", None)
+        )
+        if departure_time and arrival_time and arrival_time <= departure_time:
+            raise ValidationError("Arrival time must be after departure time.")
+        return attrs
+
+    @scheduling_flights()
     def create(self, validated_data):
-        route_data = validated_data.pop("route", None)
-        airplane_data = validated_data.pop("airplane", None)
-        airplane_type_data = airplane_data.pop("airplane_type", None)
+        route_data = validated_data.pop("route")
+        airplane_data = validated_data.pop("airplane")
+        airplane_type_data = airplane_data.pop("airplane_type")
         crew_data = validated_data.pop("crew", [])
 
-        route, _ = Route.objects.get_or_create(**route_data)
+        source, _ = Airport.objects.get_or_create(**route_data.pop("source"))
+        destination, _ = Airport.objects.get_or_create(**route_data.pop("destination"))
+        route, _ = Route.objects.get_or_create(
+            source=source, destination=destination, **route_data
+        )
 
         airplane_type, _ = AirplaneType.objects.get_or_create(**airplane_type_data)
         airplane, _ = Airplane.objects.get_or_create(
             airplane_type=airplane_type, **airplane_data
         )
 
-        crew_members = []
-        for crew_member_data in crew_data:
-            crew_member, _ = Crew.objects.get_or_create(**crew_member_data)
-            crew_members.append(crew_member)
-
         flight = Flight.objects.create(route=route, airplane=airplane, **validated_data)
-        flight.crew.set(crew_members)
+        flight.set_crew(get_or_create_crew(crew_data))
 
         return flight
 
-    @transaction.atomic
+    @scheduling_flights()
     def update(self, instance, validated_data):
         route_data = validated_data.pop("route", None)
         airplane_data = validated_data.pop("airplane", None)
         crew_data = validated_data.pop("crew", None)
 
         if route_data:
-            for attr, value in route_data.items():
-                setattr(instance.route, attr, value)
-            instance.route.save()
+            for field in ("source", "destination"):
+                airport_data = route_data.pop(field, None)
+                if airport_data:
+                    save_changed(getattr(instance.route, field), airport_data)
+            save_changed(instance.route, route_data)
 
         if airplane_data:
             airplane_type_data = airplane_data.pop("airplane_type", None)
 
             if airplane_type_data:
-                for attr, value in airplane_type_data.items():
-                    setattr(instance.airplane.airplane_type, attr, value)
-                instance.airplane.airplane_type.save()
-
-            for attr, value in airplane_data.items():
-                setattr(instance.airplane, attr, value)
-            instance.airplane.save()
+                save_changed(instance.airplane.airplane_type, airplane_type_data)
+            save_changed(instance.airplane, airplane_data)
 
+        crew = None
         if crew_data is not None:
-            crew_members = []
-            for crew_member_data in crew_data:
-                crew_member, _ = Crew.objects.get_or_create(**crew_member_data)
-                crew_members.append(crew_member)
-            instance.crew.set(crew_members)
+            crew = get_or_create_crew(crew_data)
+            # Release dropped members first so that moving the flight
+            # is not checked against their other flights.
+            instance.crew_assignments.exclude(crew__in=crew).delete()
+
+        save_changed(instance, validated_data)
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        if crew is not None:
+            instance.set_crew(crew)
 
         return instance
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class FlightRowsSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        """Take the seats held by checkouts off the available tickets."""
+        rows = super().to_representation(data)
+        held = seat_holds.held_counts([row["id"] for row in rows])
+        for row in rows:
+            # A seat sold while its hold was being released is counted once.
+            row["tickets_available"] = max(
+                row["tickets_available"] - held.get(row["id"], 0), 0
+            )
+        return rows
+
+
+class FlightListSerializer(serializers.Serializer):
+    """Flat read-only representation of `FlightViewSet` list rows from values()."""
+
+    id = serializers.IntegerField()
+    route = serializers.IntegerField()
+    source = serializers.CharField(source="route__source__name")
+    destination = serializers.CharField(source="route__destination__name")
+    airplane = serializers.IntegerField()
+    airplane_name = serializers.CharField(source="airplane__name")
+    capacity = serializers.IntegerField()
+    seats_sold = serializers.IntegerField()
+    tickets_available = serializers.IntegerField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+
     class Meta:
-        model = Order
-        fields = ("id", "created_at", "user")
+        list_serializer_class = FlightRowsSerializer
+
+
+class FlightDetailSerializer(serializers.ModelSerializer):
+    route = RouteSerializer(read_only=True)
+    airplane = AirplaneSerializer(read_only=True)
+    crew = CrewSerializer(many=True, read_only=True)
+    tickets_available = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Flight
+        fields = FlightSerializer.Meta.fields + ("seats_sold", "tickets_available")
+
+
+class FlightSeatMapSerializer(serializers.ModelSerializer):
+    rows = serializers.IntegerField(source="airplane.rows", read_only=True)
+    seats_in_row = serializers.IntegerField(
+        source="airplane.seats_in_row", read_only=True
+    )
+    tickets_available = serializers.IntegerField(read_only=True)
+    seats = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Flight
+        fields = ("id", "rows", "seats_in_row", "tickets_available", "seats")
+
+    @extend_schema_field(
+        serializers.ListField(
+            child=serializers.ListField(child=serializers.IntegerField())
+        )
+    )
+    def get_seats(self, flight):
+        """
+        Return a row by row grid where 1 marks a taken seat, 2 a seat held
+        by a checkout and 0 a free one.
+
+        Views that already loaded the taken and held seats pass them as the
+        `taken_seats` and `held_seats` context so the serializer runs no query.
+        """
+        taken = self.context.get("taken_seats")
+        if taken is None:
+            taken = set(flight.tickets.values_list("row", "seat"))
+        held = self.context.get("held_seats")
+        if held is None:
+            held = seat_holds.held_seats(flight.id)
+        return [
+            [
+                1 if (row, seat) in taken else 2 if (row, seat) in held else 0
+                for seat in range(1, flight.airplane.seats_in_row + 1)
+            ]
+            for row in range(1, flight.airplane.rows + 1)
+        ]
+
+    def to_representation(self, flight):
+        data = super().to_representation(flight)
+        held = sum(row.count(2) for row in data["seats"])
+        data["tickets_available"] = max(data["tickets_available"] - held, 0)
+        return data
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldSerializer(serializers.Serializer):
+    seats = SeatSerializer(many=True, allow_empty=False, max_length=10)
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    def validate_seats(self, seats):
+        airplane = self.context["flight"].airplane
+        for seat in seats:
+            Ticket.validate_seat(seat["row"], seat["seat"], airplane, ValidationError)
+        return list(dict.fromkeys((seat["row"], seat["seat"]) for seat in seats))
+
+
+class ItinerarySearchSerializer(serializers.Serializer):
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+    departure_date = serializers.DateField()
+    ordering = serializers.ChoiceField(
+        choices=("arrival", "distance", "hops"), default="arrival"
+    )
+    max_hops = serializers.IntegerField(min_value=1, max_value=4, default=3)
+    min_connection = serializers.IntegerField(
+        min_value=0, default=60, help_text="Minimum connection time in minutes"
+    )
+    max_connection = serializers.IntegerField(
+        min_value=1, default=24 * 60, help_text="Maximum connection time in minutes"
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+    def validate(self, attrs):
+        if attrs["source"] == attrs["destination"]:
+            raise ValidationError("Source and destination airports must be different.")
+        if attrs["min_connection"] > attrs["max_connection"]:
+            raise ValidationError(
+                "Minimum connection time must not exceed maximum connection time."
+            )
+        return attrs
+
+
+class ItinerarySerializer(serializers.Serializer):
+    distance = serializers.IntegerField()
+    hops = serializers.IntegerField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    flights = FlightSerializer(many=True)
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField(help_text="First day of the report")
+    date_to = serializers.DateField(help_text="Last day of the report")
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+    def validate(self, attrs):
+        if attrs["date_from"] > attrs["date_to"]:
+            raise ValidationError("date_from must not be after date_to.")
+        return attrs
+
+
+class RouteStatsQuerySerializer(AnalyticsQuerySerializer):
+    ordering = serializers.ChoiceField(
+        choices=("tickets", "passenger_km", "load_factor"), default="passenger_km"
+    )
+
+
+class SalesQuerySerializer(AnalyticsQuerySerializer):
+    limit = None
+    period = serializers.ChoiceField(
+        choices=("day", "week", "month", "year"), default="month"
+    )
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    output = serializers.ChoiceField(choices=("csv", "ndjson"), default="csv")
+    flight = serializers.IntegerField(required=False)
+    route = serializers.IntegerField(required=False)
+    date_from = serializers.DateField(
+        required=False, help_text="First departure day, or order day for orders"
+    )
+    date_to = serializers.DateField(
+        required=False, help_text="Last departure day, or order day for orders"
+    )
+
+
+class RouteStatsSerializer(serializers.Serializer):
+    route = serializers.IntegerField()
+    source = serializers.CharField(source="route__source__name")
+    destination = serializers.CharField(source="route__destination__name")
+    distance = serializers.IntegerField(source="route__distance")
+    flights = serializers.IntegerField()
+    tickets = serializers.IntegerField()
+    capacity = serializers.IntegerField()
+    load_factor = serializers.FloatField(allow_null=True)
+    passenger_km = serializers.IntegerField()
+
+
+class AirportStatsSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    closest_big_city = serializers.CharField()
+    departing_flights = serializers.IntegerField()
+    arriving_flights = serializers.IntegerField()
+    departing_tickets = serializers.IntegerField()
+    arriving_tickets = serializers.IntegerField()
+    tickets = serializers.IntegerField()
+
+
+class SalesSerializer(serializers.Serializer):
+    period = serializers.DateField()
+    orders = serializers.IntegerField()
+    tickets = serializers.IntegerField()
+    passenger_km = serializers.IntegerField()
 
 
 class TicketSerializer(serializers.ModelSerializer):
@@ -186,26 +627,129 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight", "order")
+        # Seat uniqueness is enforced by the unique_ticket_seat constraint.
+        validators = []
 
     def validate(self, attrs):
         flight = attrs.get("flight")
         row = attrs.get("row")
         seat = attrs.get("seat")
 
-        airplane = flight.airplane
-        if not (1 <= row <= airplane.rows):
-            raise ValidationError(f"Row must be between 1 and {airplane.rows}.")
-        if not (1 <= seat <= airplane.seats_in_row):
-            raise ValidationError(
-                f"Seat must be between 1 and {airplane.seats_in_row}."
+        Ticket.validate_seat(row, seat, flight.airplane, ValidationError)
+
+        return attrs
+
+    def create(self, validated_data):
+        with booking_seats():
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with booking_seats():
+            return super().update(instance, validated_data)
+
+
+def order_tickets():
+    """Prefetch the tickets of orders with the flight fields they show."""
+    return Prefetch(
+        "tickets",
+        queryset=Ticket.objects.select_related(
+            "flight__route__source", "flight__route__destination"
+        ).order_by("id"),
+    )
+
+
+class OrderTicketSerializer(serializers.ModelSerializer):
+    flight = serializers.IntegerField(source="flight_id")
+    source = serializers.CharField(source="flight.route.source.name", read_only=True)
+    destination = serializers.CharField(
+        source="flight.route.destination.name", read_only=True
+    )
+    departure_time = serializers.DateTimeField(
+        source="flight.departure_time", read_only=True
+    )
+    arrival_time = serializers.DateTimeField(
+        source="flight.arrival_time", read_only=True
+    )
+
+    class Meta:
+        model = Ticket
+        fields = (
+            "id",
+            "row",
+            "seat",
+            "flight",
+            "source",
+            "destination",
+            "departure_time",
+            "arrival_time",
+        )
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    tickets = OrderTicketSerializer(many=True, read_only=False, allow_empty=False)
+
+    class Meta:
+        model = Order
+        fields = ("id", "created_at", "user", "tickets")
+        read_only_fields = ("user",)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.instance is not None:
+            fields["tickets"].required = False
+        return fields
+
+    def validate_tickets(self, tickets):
+        if self.instance is not None:
+            raise ValidationError("Tickets of an existing order cannot be changed.")
+
+        flights = Flight.objects.select_related("airplane").in_bulk(
+            {ticket["flight_id"] for ticket in tickets}
+        )
+
+        seats = set()
+        for ticket in tickets:
+            flight = flights.get(ticket["flight_id"])
+            if flight is None:
+                raise ValidationError(
+                    f"Flight with id {ticket['flight_id']} does not exist."
+                )
+            Ticket.validate_seat(
+                ticket["row"], ticket["seat"], flight.airplane, ValidationError
             )
 
-        qs = Ticket.objects.filter(flight=flight, row=row, seat=seat)
-        if self.instance:
-            qs = qs.exclude(pk=self.instance.pk)
-        if qs.exists():
-            raise serializers.ValidationError(
-                "This seat is already taken on this flight."
+            key = (flight.id, ticket["row"], ticket["seat"])
+            if key in seats:
+                raise ValidationError("The same seat is booked twice in this order.")
+            seats.add(key)
+
+        return tickets
+
+    def create(self, validated_data):
+        tickets_data = validated_data.pop("tickets")
+        holder = validated_data["user"].id
+
+        seats = defaultdict(list)
+        for ticket_data in tickets_data:
+            seats[ticket_data["flight_id"]].append(
+                (ticket_data["row"], ticket_data["seat"])
+            )
+        with seat_holds.booking(seats, holder), booking_seats():
+            order = Order.objects.create(**validated_data)
+            Ticket.objects.bulk_create(
+                [Ticket(order=order, **ticket_data) for ticket_data in tickets_data]
+            )
+            Flight.add_seats_sold(
+                Counter(ticket_data["flight_id"] for ticket_data in tickets_data)
             )
 
-        return attrs
+            # The held seats became tickets.
+            transaction.on_commit(
+                lambda: [
+                    seat_holds.release(flight_id, holder, flight_seats)
+                    for flight_id, flight_seats in seats.items()
+                ]
+            )
+
+        prefetch_related_objects([order], order_tickets())
+        return order
@@ -0,0 +1,86 @@
+import threading
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from airport.cache import invalidate
+from airport.itineraries import flight_index
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Crew,
+    Flight,
+    Route,
+    Ticket,
+)
+
+
+@receiver(post_save, sender=Route)
+def update_route_in_flight_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: flight_index.update_route(instance))
+
+
+@receiver(post_delete, sender=Route)
+def remove_route_from_flight_index(sender, instance, **kwargs):
+    route_id = instance.id
+    transaction.on_commit(lambda: flight_index.remove_route(route_id))
+
+
+@receiver(post_save, sender=Flight)
+def update_flight_in_flight_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: flight_index.update_flight(instance))
+
+
+@receiver(post_delete, sender=Flight)
+def remove_flight_from_flight_index(sender, instance, **kwargs):
+    flight_id = instance.id
+    transaction.on_commit(lambda: flight_index.remove_flight(flight_id))
+
+
+class ReleasedSeats(threading.local):
+    """
+    Seats of the tickets being deleted, keyed by the id of the deletion's
+    origin, as [origin, {flight_id: -count}, tickets not deleted yet].
+    """
+
+    def __init__(self):
+        self.by_origin = {}
+
+
+released_seats = ReleasedSeats()
+
+
+@receiver(pre_delete, sender=Ticket)
+def collect_released_seat(sender, instance, origin=None, **kwargs):
+    # A deletion sends pre_delete for all of its tickets before deleting any.
+    release = released_seats.by_origin.get(id(origin))
+    if release is None or release[0] is not origin:
+        release = released_seats.by_origin[id(origin)] = [origin, Counter(), 0]
+    release[1][instance.flight_id] -= 1
+    release[2] += 1
+
+
+@receiver(post_delete, sender=Ticket)
+def release_seats(sender, instance, origin=None, **kwargs):
+    # Deletes, cascading ones too, run in a transaction. Once the last
+    # ticket of the deletion is gone, every flight is updated once.
+    release = released_seats.by_origin.get(id(origin))
+    if release is None or release[0] is not origin:
+        Flight.add_seats_sold({instance.flight_id: -1})
+        return
+    release[2] -= 1
+    if not release[2]:
+        del released_seats.by_origin[id(origin)]
+        Flight.add_seats_sold(release[1])
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    invalidate(sender)
+
+
+for model in (Airport, Route, Crew, AirplaneType, Airplane):
+    post_save.connect(invalidate_cached_responses, sender=model)
+    post_delete.connect(invalidate_cached_responses, sender=model)
@@ -1,12 +1,94 @@
+import json
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone
+from io import StringIO
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.timezone import localdate
 from rest_framework import status
+from rest_framework.serializers import BaseSerializer
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-from airport.models import Airport, Route, AirplaneType, Airplane, Crew, Flight
+from airport.admin import EstimatedCountPaginator
+from airport.benchmark import QUERY_BUDGETS, run_benchmark, seed
+from airport.exceptions import SeatHoldLimit, SeatTaken
+from airport.holds import CacheSeatHolds, LocalSeatHolds, seat_holds
+from airport.instrumentation import histograms
+from airport.itineraries import flight_index
+from airport.models import (
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Crew,
+    Flight,
+    FlightCrew,
+    Order,
+    Ticket,
+)
+from airport.pagination import OrderPagination
+from user.serializers import TokenObtainPairSerializer
 
 User = get_user_model()
 
+AIRPORTS = {
+    "Kyiv": "Boryspil",
+    "Warsaw": "Chopin",
+    "Lviv": "Danylo Halytskyi",
+    "Odesa": "Odesa",
+    "Berlin": "Brandenburg",
+}
+
+
+class FlightFixtureMixin:
+    """Create the airports, routes, airplanes and flights the tests book on."""
+
+    def create_airport(self, city):
+        return Airport.objects.get_or_create(
+            name=AIRPORTS[city], closest_big_city=city
+        )[0]
+
+    def create_route(self, source="Kyiv", destination="Warsaw", distance=800):
+        return Route.objects.create(
+            source=self.create_airport(source),
+            destination=self.create_airport(destination),
+            distance=distance,
+        )
+
+    def create_airplane(
+        self, name="UR-001", rows=10, seats_in_row=6, airplane_type="Airbus A320"
+    ):
+        return Airplane.objects.create(
+            name=name,
+            airplane_type=AirplaneType.objects.get_or_create(name=airplane_type)[0],
+            rows=rows,
+            seats_in_row=seats_in_row,
+        )
+
+    def create_flight(
+        self,
+        route=None,
+        airplane=None,
+        departure_time="2025-09-18T10:00:00Z",
+        arrival_time="2025-09-18T12:00:00Z",
+    ):
+        return Flight.objects.create(
+            route=route or self.create_route(),
+            airplane=airplane or self.create_airplane(),
+            departure_time=departure_time,
+            arrival_time=arrival_time,
+        )
+
 
 class FlightAPITest(APITestCase):
     def setUp(self):
@@ -42,10 +124,42 @@ class FlightAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data["results"]), 1)
 
+    def test_list_flights_returns_flat_rows(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(
+            response.data["results"][0],
+            {
+                "id": self.flight.id,
+                "route": self.route.id,
+                "source": "Test Airport",
+                "destination": "Test Airport",
+                "airplane": self.airplane.id,
+                "airplane_name": "Test Plane",
+                "capacity": 88,
+                "seats_sold": 0,
+                "tickets_available": 88,
+                "departure_time": "2025-09-18T05:00:00-05:00",
+                "arrival_time": "2025-09-18T07:00:00-05:00",
+            },
+        )
+
+    def test_retrieve_flight_returns_nested_details(self):
+        response = self.client.get(
+            reverse("airport:flight-detail", args=[self.flight.id])
+        )
+
+        self.assertEqual(response.data["route"]["source"]["name"], "Test Airport")
+        self.assertEqual(
+            response.data["airplane"]["airplane_type"]["name"], "Boeing 747"
+        )
+        self.assertEqual(response.data["crew"][0]["last_name"], "Doe")
+        self.assertEqual(response.data["tickets_available"], 88)
+
     def test_filter_flights_by_route(self):
         response = self.client.get(self.url, {"route": self.route.id})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data["results"][0]["route"]["id"], self.route.id)
+        self.assertEqual(response.data["results"][0]["route"], self.route.id)
 
     def test_ordering_flights_desc(self):
         flight2 = Flight.objects.create(
@@ -64,13 +178,613 @@ class FlightAPITest(APITestCase):
     def test_search_flights_by_airplane_name(self):
         response = self.client.get(self.url, {"search": "Test Plane"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["airplane"], self.airplane.id)
+
+    def test_cursor_pagination(self):
+        flights = [self.flight] + [
+            Flight.objects.create(
+                route=self.route,
+                airplane=self.airplane,
+                departure_time=f"2025-09-{day}T10:00:00Z",
+                arrival_time=f"2025-09-{day}T12:00:00Z",
+            )
+            for day in (19, 20)
+        ]
+
+        response = self.client.get(self.url, {"page_size": 2})
+        self.assertNotIn("count", response.data)
+        ids = [flight["id"] for flight in response.data["results"]]
+
+        response = self.client.get(response.data["next"])
+        ids += [flight["id"] for flight in response.data["results"]]
+
+        self.assertEqual(ids, [flight.id for flight in flights])
+        self.assertIsNone(response.data["next"])
+
+    def test_cursor_pagination_by_related_field(self):
+        other = Airport.objects.create(name="Another Airport", closest_big_city="City")
+        flight = Flight.objects.create(
+            route=Route.objects.create(
+                source=other, destination=self.airport, distance=100
+            ),
+            airplane=self.airplane,
+            departure_time="2025-09-19T10:00:00Z",
+            arrival_time="2025-09-19T12:00:00Z",
+        )
+
+        response = self.client.get(
+            self.url, {"ordering": "route__source__name", "page_size": 1}
+        )
+        self.assertEqual(response.data["results"][0]["id"], flight.id)
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["id"], self.flight.id)
+
+    def test_cursor_pagination_over_tied_rows(self):
+        start = datetime(2025, 10, 1, tzinfo=timezone.utc)
+        Flight.objects.bulk_create(
+            Flight(
+                route=self.route,
+                airplane=self.airplane,
+                departure_time=start + timedelta(hours=3 * index),
+                arrival_time=start + timedelta(hours=3 * index + 2),
+            )
+            for index in range(1200)
+        )
+        expected = list(Flight.objects.order_by("id").values_list("id", flat=True))
+
+        ids = []
+        url = self.url + "?ordering=seats_sold&page_size=100"
+        for _ in range(13):
+            response = self.client.get(url)
+            ids += [flight["id"] for flight in response.data["results"]]
+            url = response.data["next"]
+        self.assertIsNone(url)
+        self.assertEqual(ids, expected)
+
+        response = self.client.get(
+            self.url, {"ordering": "-seats_sold", "page_size": 100}
+        )
+        for _ in range(11):
+            response = self.client.get(response.data["next"])
+        previous = self.client.get(response.data["previous"])
+        self.assertEqual(
+            [flight["id"] for flight in previous.data["results"]],
+            expected[::-1][1000:1100],
+        )
+
+
+class FlightWriteAPITest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@test.com", password="admin123", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse("airport:flight-list")
+
+    def flight_data(self, day, crew_size):
+        return {
+            "route": {
+                "source": {"name": "Boryspil", "closest_big_city": "Kyiv"},
+                "destination": {"name": "Chopin", "closest_big_city": "Warsaw"},
+                "distance": 700,
+            },
+            "airplane": {
+                "name": "UR-006",
+                "rows": 30,
+                "seats_in_row": 6,
+                "airplane_type": {"name": "Airbus A320"},
+            },
+            "departure_time": f"2025-09-{day}T10:00:00Z",
+            "arrival_time": f"2025-09-{day}T12:00:00Z",
+            "crew": [
+                {"first_name": f"Member {day}-{number}", "last_name": "Doe"}
+                for number in range(crew_size)
+            ],
+        }
+
+    def create_flight(self, day, crew_size):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                self.url, self.flight_data(day, crew_size), format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response, len(queries)
+
+    def test_create_flight_with_nested_data(self):
+        response, _ = self.create_flight(18, 2)
+
+        flight = Flight.objects.get(id=response.data["id"])
+        self.assertEqual(flight.route.source.name, "Boryspil")
+        self.assertEqual(flight.airplane.airplane_type.name, "Airbus A320")
+        self.assertEqual(flight.crew.count(), 2)
+
+    def test_create_flight_query_count_does_not_depend_on_crew_size(self):
+        self.create_flight(18, 1)
+
+        _, small_crew_queries = self.create_flight(19, 2)
+        _, large_crew_queries = self.create_flight(20, 12)
+
+        self.assertEqual(small_crew_queries, large_crew_queries)
+
+    def test_seat_filters_apply_to_every_action(self):
+        response, _ = self.create_flight(18, 1)
+        params = "?min_seats_left=1&ordering=tickets_available"
+        detail = reverse("airport:flight-detail", args=[response.data["id"]])
+
+        response = self.client.patch(
+            detail + params, {"arrival_time": "2025-09-18T13:00:00Z"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(
+            reverse("airport:flight-holds", args=[response.data["id"]]) + params,
+            {"seats": [{"row": 1, "seat": 1}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.delete(detail + params)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_update_flight_skips_unchanged_nested_objects(self):
+        response, _ = self.create_flight(18, 3)
+        url = reverse("airport:flight-detail", args=[response.data["id"]])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(url, self.flight_data(18, 3), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            [query for query in queries if query["sql"].startswith("UPDATE")]
+        )
+
+
+class FlightScheduleConflictTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@test.com", password="admin123", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def flight_data(self, airplane, departure, arrival, crew):
+        return {
+            "route": {
+                "source": {"name": "Boryspil", "closest_big_city": "Kyiv"},
+                "destination": {"name": "Chopin", "closest_big_city": "Warsaw"},
+                "distance": 700,
+            },
+            "airplane": {
+                "name": airplane,
+                "rows": 30,
+                "seats_in_row": 6,
+                "airplane_type": {"name": "Airbus A320"},
+            },
+            "departure_time": f"2025-09-18T{departure}:00Z",
+            "arrival_time": f"2025-09-18T{arrival}:00Z",
+            "crew": [{"first_name": name, "last_name": "Doe"} for name in crew],
+        }
+
+    def create_flight(self, *args):
+        return self.client.post(
+            reverse("airport:flight-list"), self.flight_data(*args), format="json"
+        )
+
+    def test_airplane_cannot_fly_overlapping_flights(self):
+        self.create_flight("UR-007", "10:00", "12:00", ["John"])
+
+        response = self.create_flight("UR-007", "11:00", "13:00", ["Jane"])
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn("airplane", response.data["detail"])
+        self.assertEqual(Flight.objects.count(), 1)
+
+    def test_airplane_cannot_reuse_departure_time(self):
+        self.create_flight("UR-007", "10:00", "12:00", ["John"])
+        flight_id = self.create_flight("UR-007", "13:00", "15:00", ["Jane"]).data["id"]
+
+        response = self.create_flight("UR-007", "10:00", "10:30", [])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn("airplane", response.data["detail"])
+
+        response = self.client.put(
+            reverse("airport:flight-detail", args=[flight_id]),
+            self.flight_data("UR-007", "10:00", "10:30", ["Jane"]),
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Flight.objects.count(), 2)
+
+    def test_crew_member_cannot_fly_overlapping_flights(self):
+        self.create_flight("UR-007", "10:00", "12:00", ["John"])
+
+        response = self.create_flight("UR-008", "11:59", "13:00", ["Jane", "John"])
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn("crew member", response.data["detail"])
+        self.assertEqual(Flight.objects.count(), 1)
+
+    def test_back_to_back_flights_are_allowed(self):
+        self.create_flight("UR-007", "10:00", "12:00", ["John"])
+
+        response = self.create_flight("UR-007", "12:00", "14:00", ["John"])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_adding_crew_copies_flight_times(self):
+        flight_id = self.create_flight("UR-007", "10:00", "12:00", []).data["id"]
+        flight = Flight.objects.get(id=flight_id)
+        crew = Crew.objects.create(first_name="John", last_name="Doe")
+
+        flight.crew.add(crew)
+
+        assignment = FlightCrew.objects.get(flight=flight, crew=crew)
+        self.assertEqual(
+            (assignment.departure_time, assignment.arrival_time),
+            (flight.departure_time, flight.arrival_time),
+        )
+
+    def test_admin_rejects_overlapping_crew(self):
+        self.create_flight("UR-007", "10:00", "12:00", ["John"])
+        flight_id = self.create_flight("UR-008", "11:00", "13:00", ["Jane"]).data["id"]
+        flight = Flight.objects.get(id=flight_id)
+        jane = flight.crew_assignments.get()
+        john = Crew.objects.get(first_name="John")
+        self.client.force_login(
+            User.objects.create_superuser(email="root@test.com", password="root123")
+        )
+
+        response = self.client.post(
+            reverse("admin:airport_flight_change", args=[flight_id]),
+            {
+                "route": flight.route_id,
+                "airplane": flight.airplane_id,
+                "departure_time_0": "2025-09-18",
+                "departure_time_1": "06:00:00",
+                "arrival_time_0": "2025-09-18",
+                "arrival_time_1": "08:00:00",
+                "crew_assignments-TOTAL_FORMS": 2,
+                "crew_assignments-INITIAL_FORMS": 1,
+                "crew_assignments-0-id": jane.id,
+                "crew_assignments-0-flight": flight_id,
+                "crew_assignments-0-crew": jane.crew_id,
+                "crew_assignments-1-flight": flight_id,
+                "crew_assignments-1-crew": john.id,
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        formset = response.context["inline_admin_formsets"][0].formset
+        self.assertEqual(
+            formset.non_form_errors(),
+            ["Doe John is already scheduled on an overlapping flight."],
+        )
+        self.assertEqual(flight.crew_assignments.count(), 1)
+
+    def test_moving_flight_moves_crew_schedule(self):
+        self.create_flight("UR-007", "10:00", "12:00", ["John"])
+        flight_id = self.create_flight("UR-008", "13:00", "15:00", ["John"]).data["id"]
+        url = reverse("airport:flight-detail", args=[flight_id])
+
+        response = self.client.patch(
+            url, {"departure_time": "2025-09-18T11:00:00Z"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.put(
+            url, self.flight_data("UR-008", "11:00", "15:00", ["Jane"]), format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(
+                FlightCrew.objects.filter(flight_id=flight_id).values_list(
+                    "crew__first_name", "departure_time"
+                )
+            ),
+            [("Jane", datetime(2025, 9, 18, 11, tzinfo=timezone.utc))],
+        )
+
+    def test_arrival_must_follow_departure(self):
+        response = self.create_flight("UR-007", "12:00", "10:00", [])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_available_crew(self):
+        self.create_flight("UR-007", "10:00", "12:00", ["John"])
+        self.create_flight("UR-008", "14:00", "16:00", ["Jane"])
+        Crew.objects.create(first_name="Jim", last_name="Doe")
+
+        response = self.client.get(
+            reverse("airport:crew-available"),
+            {"start": "2025-09-18T11:00:00Z", "end": "2025-09-18T14:00:00Z"},
+        )
+
+        self.assertEqual(
+            [member["first_name"] for member in response.data["results"]],
+            ["Jane", "Jim"],
+        )
+
+
+class FlightSearchAPITest(FlightFixtureMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@gmail.com", password="testcase"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.warsaw = self.create_airport("Warsaw")
+        self.small = self.create_airplane("UR-003", rows=1, seats_in_row=2)
+        self.to_warsaw = self.create_flight(
+            self.create_route("Kyiv", "Warsaw", 700), self.small
+        )
+        self.to_lviv = self.create_flight(
+            self.create_route("Kyiv", "Lviv", 500),
+            self.create_airplane("UR-004", rows=10, seats_in_row=4),
+            departure_time="2025-09-20T10:00:00Z",
+            arrival_time="2025-09-20T11:00:00Z",
+        )
+
+        self.url = reverse("airport:flight-list")
+
+    def get_ids(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [flight["id"] for flight in response.data["results"]]
+
+    def test_filter_by_destination_airport(self):
+        self.assertEqual(
+            self.get_ids({"destination": self.warsaw.id}), [self.to_warsaw.id]
+        )
+
+    def test_filter_by_city(self):
+        self.assertEqual(
+            self.get_ids({"source_city": "Kyiv"}),
+            [
+                self.to_warsaw.id,
+                self.to_lviv.id,
+            ],
+        )
+        self.assertEqual(self.get_ids({"destination_city": "Lviv"}), [self.to_lviv.id])
+
+    def test_filter_by_departure_date(self):
+        self.assertEqual(
+            self.get_ids({"departure_date_after": "2025-09-19"}), [self.to_lviv.id]
+        )
+        self.assertEqual(
+            self.get_ids({"departure_date_before": "2025-09-18"}),
+            [self.to_warsaw.id],
+        )
+
+    def test_filter_by_min_seats_left(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=self.to_warsaw, order=order, row=1, seat=1)
+
+        self.assertEqual(self.get_ids({"min_seats_left": 2}), [self.to_lviv.id])
+        self.assertEqual(
+            self.get_ids({"min_seats_left": 1}), [self.to_warsaw.id, self.to_lviv.id]
+        )
+
+
+class ItineraryAPITest(FlightFixtureMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@gmail.com", password="testcase"
+        )
+        self.client.force_authenticate(user=self.user)
+        flight_index.invalidate()
+        self.day = date.today() + timedelta(days=7)
+
+        self.kyiv = self.create_airport("Kyiv")
+        self.warsaw = self.create_airport("Warsaw")
+        self.berlin = self.create_airport("Berlin")
+
+        self.to_warsaw = self.add_leg("Kyiv", "Warsaw", 700, self.at(8), self.at(9, 30))
+        self.warsaw_to_berlin = self.add_leg(
+            "Warsaw", "Berlin", 500, self.at(11), self.at(12, 30)
+        )
+        self.to_berlin = self.add_leg("Kyiv", "Berlin", 1300, self.at(10), self.at(13))
+
+        self.url = reverse("airport:flight-itineraries")
+
+    def at(self, hour, minute=0):
+        return datetime.combine(self.day, time(hour, minute), tzinfo=timezone.utc)
+
+    def add_leg(self, source, destination, distance, departure, arrival):
+        # Every flight gets its own airplane, so their times may overlap.
+        return self.create_flight(
+            self.create_route(source, destination, distance),
+            self.create_airplane(f"UR-{source}-{destination}"),
+            departure,
+            arrival,
+        )
+
+    def search(self, **params):
+        response = self.client.get(
+            self.url,
+            {
+                "source": self.kyiv.id,
+                "destination": self.berlin.id,
+                "departure_date": self.day,
+                **params,
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            [flight["id"] for flight in itinerary["flights"]]
+            for itinerary in response.data
+        ]
+
+    def test_itineraries_by_arrival(self):
+        self.assertEqual(
+            self.search(),
+            [[self.to_warsaw.id, self.warsaw_to_berlin.id], [self.to_berlin.id]],
+        )
+
+    def test_itineraries_by_hops(self):
+        self.assertEqual(
+            self.search(ordering="hops"),
+            [[self.to_berlin.id], [self.to_warsaw.id, self.warsaw_to_berlin.id]],
+        )
+
+    def test_itineraries_by_distance(self):
+        response = self.client.get(
+            self.url,
+            {
+                "source": self.kyiv.id,
+                "destination": self.berlin.id,
+                "departure_date": self.day,
+                "ordering": "distance",
+            },
+        )
+
         self.assertEqual(
-            response.data["results"][0]["airplane"]["id"], self.airplane.id
+            [itinerary["distance"] for itinerary in response.data], [1200, 1300]
+        )
+
+    def test_itineraries_respect_minimum_connection_time(self):
+        self.assertEqual(self.search(min_connection=120), [[self.to_berlin.id]])
+
+    def test_itineraries_respect_departure_date(self):
+        self.assertEqual(self.search(departure_date=self.day + timedelta(days=1)), [])
+
+    def test_itineraries_skip_departed_flights(self):
+        now = datetime.now(timezone.utc)
+        self.to_warsaw.departure_time = now - timedelta(hours=2)
+        self.to_warsaw.arrival_time = now - timedelta(hours=1)
+        self.to_warsaw.save()
+        flight_index.invalidate()
+
+        self.assertEqual(
+            self.search(
+                destination=self.warsaw.id,
+                departure_date=localdate(self.to_warsaw.departure_time),
+            ),
+            [],
+        )
+        self.assertEqual(self.search(), [[self.to_berlin.id]])
+
+    @override_settings(ITINERARY_MAX_EXPANSIONS=0)
+    def test_itinerary_search_stops_after_max_expansions(self):
+        self.assertEqual(self.search(), [[self.to_berlin.id]])
+
+    def test_flight_index_is_updated_on_flight_changes(self):
+        self.search()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.to_berlin.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.warsaw_to_berlin.departure_time = self.at(9)
+            self.warsaw_to_berlin.save()
+
+        self.assertEqual(self.search(), [])
+
+    def test_flight_index_reads_flights_with_their_routes(self):
+        # One query reads flights and routes from the same snapshot, so a
+        # flight never refers to a route missing from the index.
+        with self.assertNumQueries(1):
+            flight_index._build()
+
+        self.assertEqual(
+            self.search(),
+            [[self.to_warsaw.id, self.warsaw_to_berlin.id], [self.to_berlin.id]],
+        )
+
+
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(airports=10, routes=20, flights=30, crew=20, users=5)
+        cls.user = User.objects.filter(orders__isnull=False).order_by("id").first()
+        cls.admin = User.objects.create_user(
+            email="admin@test.com", password="admin123", is_staff=True
+        )
+
+    def setUp(self):
+        flight_index.invalidate()
+
+    def test_endpoints_stay_within_query_budgets(self):
+        report = run_benchmark(self.user, self.admin, requests=1)
+
+        for name, result in report.items():
+            with self.subTest(endpoint=name):
+                self.assertTrue(status.is_success(result["status"]))
+                self.assertLessEqual(result["queries"], QUERY_BUDGETS[name])
+
+    def test_every_routed_endpoint_has_a_budget(self):
+        budget = QUERY_BUDGETS.pop("ticket-export")
+        try:
+            with self.assertRaisesMessage(ValueError, "ticket-export"):
+                run_benchmark(self.user, self.admin, requests=1)
+        finally:
+            QUERY_BUDGETS["ticket-export"] = budget
+
+
+class IndexUsageTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(
+            airports=10,
+            routes=40,
+            flights=2000,
+            tickets_per_flight=6,
+            crew=100,
+            users=20,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset, index_name=None):
+        plan = queryset.explain()
+        self.assertNotIn("Seq Scan", plan)
+        self.assertNotIn("Sort", plan)
+        if index_name:
+            self.assertIn(f" {index_name} ", plan)
+
+    def test_orders_of_user_by_created_at(self):
+        user_id = Order.objects.values_list("user", flat=True).first()
+        orders = Order.objects.filter(user=user_id).order_by(*OrderPagination.ordering)
+        pagination = OrderPagination()
+        pagination.ordering = OrderPagination.ordering
+        position = pagination._get_position_from_instance(
+            orders[10], pagination.ordering
+        )
+
+        self.assertUsesIndex(orders[:21], "airport_ord_user_id_f7a400_idx")
+        self.assertUsesIndex(
+            orders.filter(pagination.keyset_filter(position, reverse=False))[:21],
+            "airport_ord_user_id_f7a400_idx",
+        )
+
+    def test_flights_of_route_by_departure_time(self):
+        route_id = Flight.objects.values_list("route", flat=True).first()
+
+        self.assertUsesIndex(
+            Flight.objects.filter(route=route_id), "airport_fli_route_i_baa295_idx"
+        )
+        self.assertUsesIndex(
+            Flight.objects.filter(route=route_id).order_by("departure_time")[:10]
+        )
+
+    def test_taken_seats_of_flight(self):
+        flight = Flight.objects.first()
+
+        self.assertUsesIndex(
+            flight.tickets.values_list("row", "seat"), "unique_ticket_seat"
+        )
+
+    def test_tickets_of_orders(self):
+        order_ids = list(Order.objects.values_list("id", flat=True)[:20])
+
+        self.assertUsesIndex(
+            Ticket.objects.filter(order__in=order_ids),
+            "airport_ticket_order_covering",
         )
 
 
 class PermissionsAPITest(APITestCase):
     def setUp(self):
+        cache.clear()
         self.airport_data = {"name": "Test Airport", "closest_big_city": "Test City"}
 
         self.user = User.objects.create_user(email="user@test.com", password="test123")
@@ -103,3 +817,1258 @@ class PermissionsAPITest(APITestCase):
         self.client.force_authenticate(user=self.admin)
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class OrderAPITest(FlightFixtureMixin, APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@test.com", password="admin123", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        self.flight = self.create_flight()
+
+        self.url = reverse("airport:order-list")
+
+    def book(self, *seats):
+        return self.client.post(
+            self.url,
+            {
+                "tickets": [
+                    {"flight": self.flight.id, "row": row, "seat": seat}
+                    for row, seat in seats
+                ]
+            },
+            format="json",
+        )
+
+    def test_create_order_with_tickets(self):
+        response = self.book((1, 1), (1, 2), (2, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["tickets"]), 3)
+        order = Order.objects.get(id=response.data["id"])
+        self.assertEqual(order.user, self.admin)
+        self.assertEqual(order.tickets.count(), 3)
+
+    def test_create_order_with_token_claims(self):
+        self.client.force_authenticate(user=None)
+        token = TokenObtainPairSerializer.get_token(self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        with self.assertNumQueries(7):
+            response = self.book((1, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.get(id=response.data["id"]).user, self.admin)
+
+    def test_create_order_uses_constant_number_of_queries(self):
+        with self.assertNumQueries(7):
+            response = self.book(*[(row, 1) for row in range(1, 11)])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_create_order_with_seat_out_of_range_creates_nothing(self):
+        response = self.book((1, 1), (11, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_create_order_with_taken_seat_creates_nothing(self):
+        self.book((1, 1))
+
+        response = self.book((1, 2), (1, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_create_order_with_duplicate_seats_fails(self):
+        response = self.book((1, 1), (1, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_ticket_for_taken_seat_conflicts(self):
+        order = Order.objects.create(user=self.admin)
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=1)
+
+        response = self.client.post(
+            reverse("airport:ticket-list"),
+            {"flight": self.flight.id, "order": order.id, "row": 1, "seat": 1},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_update_order_rejects_tickets(self):
+        order_id = self.book((1, 1)).data["id"]
+        url = reverse("airport:order-detail", args=[order_id])
+
+        response = self.client.put(
+            url,
+            {"tickets": [{"flight": self.flight.id, "row": 2, "seat": 2}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tickets", response.data)
+        self.assertEqual(
+            list(Ticket.objects.values_list("order", "row", "seat")),
+            [(order_id, 1, 1)],
+        )
+
+        response = self.client.put(url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["tickets"]), 1)
+
+
+class OrderHistoryAPITest(FlightFixtureMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@gmail.com", password="testcase"
+        )
+        self.other = User.objects.create_user(
+            email="other@gmail.com", password="testcase"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.flight = self.create_flight()
+
+        self.orders = []
+        for row in range(1, 4):
+            order = Order.objects.create(user=self.user)
+            Ticket.objects.create(flight=self.flight, order=order, row=row, seat=1)
+            Ticket.objects.create(flight=self.flight, order=order, row=row, seat=2)
+            self.orders.append(order)
+        self.other_order = Order.objects.create(user=self.other)
+        Ticket.objects.create(flight=self.flight, order=self.other_order, row=9, seat=1)
+
+    def test_list_only_own_orders_newest_first(self):
+        response = self.client.get(reverse("airport:order-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [order["id"] for order in response.data["results"]],
+            [order.id for order in reversed(self.orders)],
+        )
+
+    def test_orders_embed_tickets_with_flight(self):
+        response = self.client.get(reverse("airport:order-list"))
+
+        ticket = response.data["results"][-1]["tickets"][0]
+        self.assertEqual(ticket["row"], 1)
+        self.assertEqual(ticket["flight"], self.flight.id)
+        self.assertEqual(ticket["source"], "Boryspil")
+        self.assertEqual(ticket["destination"], "Chopin")
+        self.assertEqual(
+            datetime.fromisoformat(ticket["departure_time"]),
+            datetime(2025, 9, 18, 10, tzinfo=timezone.utc),
+        )
+        self.assertIn("arrival_time", ticket)
+
+    def test_list_orders_uses_constant_number_of_queries(self):
+        for _ in range(5):
+            order = Order.objects.create(user=self.user)
+            Ticket.objects.create(
+                flight=self.flight, order=order, row=order.id % 10 + 1, seat=6
+            )
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("airport:order-list"), {"page_size": 20})
+
+        self.assertEqual(len(response.data["results"]), 8)
+
+    def test_order_of_another_user_is_not_found(self):
+        response = self.client.get(
+            reverse("airport:order-detail", args=[self.other_order.id])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_only_own_tickets(self):
+        response = self.client.get(reverse("airport:ticket-list"), {"page_size": 20})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 6)
+        self.assertNotIn(
+            self.other_order.id,
+            {ticket["order"] for ticket in response.data["results"]},
+        )
+
+
+class FlightSeatMapAPITest(FlightFixtureMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@gmail.com", password="testcase"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.flight = self.create_flight(
+            airplane=self.create_airplane(rows=3, seats_in_row=2)
+        )
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=2)
+        Ticket.objects.create(flight=self.flight, order=order, row=3, seat=1)
+
+    def test_seat_map(self):
+        response = self.client.get(
+            reverse("airport:flight-seat-map", args=[self.flight.id])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["tickets_available"], 4)
+        self.assertEqual(response.data["seats"], [[0, 1], [0, 0], [1, 0]])
+
+    def test_list_flights_includes_tickets_available(self):
+        response = self.client.get(reverse("airport:flight-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["tickets_available"], 4)
+
+
+class SeatHoldTest(FlightFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="test@gmail.com", password="testcase", is_staff=True
+        )
+        self.other = User.objects.create_user(
+            email="other@gmail.com", password="testcase"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.flight = self.create_flight(
+            airplane=self.create_airplane(rows=3, seats_in_row=2)
+        )
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=2)
+        self.url = reverse("airport:flight-holds", args=[self.flight.id])
+
+    def hold(self, *seats):
+        return self.client.post(
+            self.url,
+            {"seats": [{"row": row, "seat": seat} for row, seat in seats]},
+            format="json",
+        )
+
+    def book(self, *seats):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse("airport:order-list"),
+                {
+                    "tickets": [
+                        {"flight": self.flight.id, "row": row, "seat": seat}
+                        for row, seat in seats
+                    ]
+                },
+                format="json",
+            )
+
+    def test_hold_seats(self):
+        response = self.hold((2, 1), (2, 2))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["seats"]), 2)
+        self.assertIn("expires_at", response.data)
+        self.assertEqual(
+            seat_holds.held_seats(self.flight.id),
+            {(2, 1): self.user.id, (2, 2): self.user.id},
+        )
+
+    def test_hold_seat_held_by_another_user_conflicts(self):
+        seat_holds.hold(self.flight.id, [(2, 1)], self.other.id)
+
+        response = self.hold((2, 2), (2, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertNotIn((2, 2), seat_holds.held_seats(self.flight.id))
+
+    def test_hold_sold_seat_conflicts(self):
+        response = self.hold((1, 2))
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_hold_seat_out_of_range_fails(self):
+        response = self.hold((4, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_release_holds(self):
+        self.hold((2, 1))
+        seat_holds.hold(self.flight.id, [(3, 1)], self.other.id)
+
+        response = self.client.delete(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(seat_holds.held_seats(self.flight.id), {(3, 1): self.other.id})
+
+    def test_seat_map_and_list_count_held_seats(self):
+        seat_holds.hold(self.flight.id, [(2, 1), (3, 2)], self.other.id)
+
+        seat_map = self.client.get(
+            reverse("airport:flight-seat-map", args=[self.flight.id])
+        )
+        flights = self.client.get(reverse("airport:flight-list"))
+
+        self.assertEqual(seat_map.data["seats"], [[0, 1], [2, 0], [0, 2]])
+        self.assertEqual(seat_map.data["tickets_available"], 3)
+        self.assertEqual(flights.data["results"][0]["tickets_available"], 3)
+
+    def test_order_of_seat_held_by_another_user_conflicts(self):
+        seat_holds.hold(self.flight.id, [(2, 1)], self.other.id)
+
+        response = self.book((2, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_order_releases_own_holds(self):
+        self.hold((2, 1), (2, 2))
+
+        response = self.book((2, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(seat_holds.held_seats(self.flight.id), {(2, 2): self.user.id})
+
+    def test_holds_expire(self):
+        for backend in (LocalSeatHolds(), CacheSeatHolds()):
+            backend.hold(self.flight.id, [(2, 1)], self.other.id, ttl=-1)
+            backend.hold(self.flight.id, [(2, 2)], self.other.id)
+
+            backend.hold(self.flight.id, [(2, 1)], self.user.id)
+
+            self.assertEqual(
+                backend.held_seats(self.flight.id),
+                {(2, 1): self.user.id, (2, 2): self.other.id},
+            )
+            self.assertEqual(
+                backend.held_counts([self.flight.id, 0]), {self.flight.id: 2}
+            )
+            with self.assertRaises(SeatTaken):
+                backend.check(self.flight.id, [(2, 2)], self.user.id)
+            cache.clear()
+
+    def test_hold_requires_staff(self):
+        self.client.force_authenticate(user=self.other)
+
+        response = self.hold((2, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(seat_holds.held_seats(self.flight.id), {})
+
+    def test_holds_per_holder_are_limited(self):
+        for backend in (LocalSeatHolds(), CacheSeatHolds()):
+            backend.max_seats_per_holder = 2
+            backend.hold(self.flight.id, [(2, 1), (2, 2)], self.user.id)
+            backend.hold(self.flight.id, [(2, 1)], self.user.id)
+            backend.hold(self.flight.id, [(3, 1)], self.other.id)
+
+            with self.assertRaises(SeatHoldLimit):
+                backend.hold(self.flight.id, [(3, 2)], self.user.id)
+            self.assertNotIn((3, 2), backend.held_seats(self.flight.id))
+            cache.clear()
+
+    def test_hold_rechecks_sold_seats_while_locked(self):
+        for backend in (LocalSeatHolds(), CacheSeatHolds()):
+            with self.assertRaises(SeatTaken):
+                backend.hold(
+                    self.flight.id, [(2, 1)], self.user.id, sold=lambda seats: True
+                )
+            self.assertEqual(backend.held_seats(self.flight.id), {})
+
+    def test_booking_keeps_flight_locked(self):
+        backend = CacheSeatHolds()
+        backend.lock_wait = 0
+        backend.hold(self.flight.id, [(2, 1)], self.user.id)
+
+        with backend.booking({self.flight.id: [(2, 1)]}, self.user.id):
+            backend.release(self.flight.id, self.user.id)
+            with ThreadPoolExecutor() as executor:
+                other = executor.submit(
+                    backend.hold, self.flight.id, [(2, 2)], self.other.id
+                )
+                with self.assertRaises(SeatTaken):
+                    other.result()
+
+        self.assertEqual(backend.held_seats(self.flight.id), {})
+
+    def test_held_sold_seats_do_not_make_availability_negative(self):
+        seats = [(row, seat) for row in range(1, 4) for seat in range(1, 3)]
+        seat_holds.hold(self.flight.id, seats, self.other.id)
+
+        seat_map = self.client.get(
+            reverse("airport:flight-seat-map", args=[self.flight.id])
+        )
+        flights = self.client.get(reverse("airport:flight-list"))
+
+        self.assertEqual(seat_map.data["seats"], [[2, 1], [2, 2], [2, 2]])
+        self.assertEqual(seat_map.data["tickets_available"], 0)
+        self.assertEqual(flights.data["results"][0]["tickets_available"], 0)
+
+
+class AsyncReadAPITest(FlightFixtureMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@gmail.com", password="testcase"
+        )
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+        route = self.create_route("Kyiv", "Lviv", 470)
+        self.kyiv, self.lviv = route.source, route.destination
+        airplane = self.create_airplane(rows=3, seats_in_row=2)
+        self.flights = [
+            self.create_flight(
+                route,
+                airplane,
+                departure_time=f"2025-09-18T{hour:02d}:00:00Z",
+                arrival_time=f"2025-09-18T{hour + 1:02d}:00:00Z",
+            )
+            for hour in (14, 10, 12)
+        ]
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(flight=self.flights[1], order=order, row=1, seat=2)
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(reverse("airport:async-flight-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_flight_list_matches_sync_list(self):
+        response = await self.async_client.get(
+            reverse("airport:async-flight-list"),
+            {"page_size": 10},
+            headers=self.headers,
+        )
+
+        self.client.force_authenticate(user=self.user)
+        expected = await sync_to_async(self.client.get)(
+            reverse("airport:flight-list"), {"page_size": 10}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], expected.json()["results"])
+        self.assertIsNone(response.json()["next"])
+
+    async def test_flight_list_pages_by_departure_time(self):
+        url = reverse("airport:async-flight-list") + "?page_size=2"
+        first = (await self.async_client.get(url, headers=self.headers)).json()
+        second = (
+            await self.async_client.get(first["next"], headers=self.headers)
+        ).json()
+
+        self.assertEqual(
+            [flight["id"] for flight in first["results"] + second["results"]],
+            [self.flights[1].id, self.flights[2].id, self.flights[0].id],
+        )
+        self.assertIsNone(second["next"])
+
+    async def test_flight_list_filters(self):
+        response = await self.async_client.get(
+            reverse("airport:async-flight-list"),
+            {"source_city": "Kyiv", "min_seats_left": 6},
+            headers=self.headers,
+        )
+
+        self.assertEqual(
+            [flight["id"] for flight in response.json()["results"]],
+            [self.flights[2].id, self.flights[0].id],
+        )
+
+    async def test_seat_map(self):
+        response = await self.async_client.get(
+            reverse("airport:async-flight-seat-map", args=[self.flights[1].id]),
+            headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["tickets_available"], 5)
+        self.assertEqual(response.json()["seats"], [[0, 1], [0, 0], [0, 0]])
+
+    async def test_seat_map_of_unknown_flight(self):
+        response = await self.async_client.get(
+            reverse("airport:async-flight-seat-map", args=[0]), headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_airport_lookup(self):
+        response = await self.async_client.get(
+            reverse("airport:async-airport-lookup"),
+            {"search": "lv"},
+            headers=self.headers,
+        )
+
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "id": self.lviv.id,
+                    "name": "Danylo Halytskyi",
+                    "closest_big_city": "Lviv",
+                }
+            ],
+        )
+
+
+class BulkWriteAPITest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        flight_index.invalidate()
+
+        self.admin = User.objects.create_user(
+            email="admin@test.com", password="admin123", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.boryspil = Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+
+    def test_bulk_create_airports(self):
+        response = self.client.post(
+            reverse("airport:airport-bulk"),
+            [
+                {"name": "Chopin", "closest_big_city": "Warsaw"},
+                {"name": "Schiphol", "closest_big_city": "Amsterdam"},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(response.data["errors"], [])
+        self.assertEqual(Airport.objects.count(), 3)
+
+    def test_bulk_create_routes_uses_constant_number_of_queries(self):
+        routes = [
+            {
+                "source": {"name": "Boryspil", "closest_big_city": "Kyiv"},
+                "destination": {"name": f"Airport {number}", "closest_big_city": "X"},
+                "distance": 100 + number,
+            }
+            for number in range(50)
+        ]
+
+        # Airports lookup, airports insert, routes insert and savepoints.
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                reverse("airport:route-bulk"), routes, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["results"]), 50)
+        self.assertEqual(Airport.objects.count(), 51)
+        self.assertEqual(Route.objects.filter(source=self.boryspil).count(), 50)
+
+    def test_bulk_create_reports_invalid_items(self):
+        response = self.client.post(
+            reverse("airport:airplane-bulk"),
+            [
+                {
+                    "name": "UR-001",
+                    "rows": 10,
+                    "seats_in_row": 6,
+                    "airplane_type": {"name": "Airbus A320"},
+                },
+                {"name": "UR-002", "rows": "many", "airplane_type": {"name": "A"}},
+                {
+                    "name": "UR-003",
+                    "rows": 20,
+                    "seats_in_row": 4,
+                    "airplane_type": {"name": "Airbus A320"},
+                },
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [airplane["name"] for airplane in response.data["results"]],
+            ["UR-001", "UR-003"],
+        )
+        self.assertEqual(len(response.data["errors"]), 1)
+        self.assertEqual(response.data["errors"][0]["index"], 1)
+        self.assertIn("rows", response.data["errors"][0]["errors"])
+        self.assertEqual(AirplaneType.objects.count(), 1)
+
+    def test_bulk_create_with_only_invalid_items_fails(self):
+        response = self.client.post(
+            reverse("airport:airport-bulk"), [{"name": "Chopin"}], format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Airport.objects.count(), 1)
+
+    def test_bulk_update_routes(self):
+        chopin = Airport.objects.create(name="Chopin", closest_big_city="Warsaw")
+        route = Route.objects.create(
+            source=self.boryspil, destination=chopin, distance=800
+        )
+        other = Route.objects.create(
+            source=chopin, destination=self.boryspil, distance=800
+        )
+
+        response = self.client.patch(
+            reverse("airport:route-bulk"),
+            [
+                {"id": route.id, "distance": 810},
+                {
+                    "id": other.id,
+                    "destination": {
+                        "name": "Schiphol",
+                        "closest_big_city": "Amsterdam",
+                    },
+                },
+                {"id": 0, "distance": 1},
+                {"id": route.id, "source": {"name": "Chopin"}},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [2, 3])
+        route.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(route.distance, 810)
+        self.assertEqual(route.source, self.boryspil)
+        self.assertEqual(other.destination.name, "Schiphol")
+        self.assertEqual(other.source, chopin)
+
+    def test_bulk_write_requires_staff(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(email="user@test.com", password="user123")
+        )
+
+        response = self.client.post(
+            reverse("airport:airport-bulk"),
+            [{"name": "Chopin", "closest_big_city": "Warsaw"}],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_write_invalidates_cache(self):
+        url = reverse("airport:airport-list")
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("airport:airport-bulk"),
+                [{"name": "Chopin", "closest_big_city": "Warsaw"}],
+                format="json",
+            )
+
+        self.assertEqual(self.client.get(url).data["count"], 2)
+
+
+class ReferenceDataCacheAPITest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.admin = User.objects.create_user(
+            email="admin@test.com", password="admin123", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+        Airport.objects.create(name="Boryspil", closest_big_city="Kyiv")
+
+        self.url = reverse("airport:airport-list")
+
+    def test_list_is_served_from_cache(self):
+        self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_write_invalidates_cache(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {"name": "Chopin", "closest_big_city": "Warsaw"})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_nested_model_change_invalidates_cache(self):
+        airport = Airport.objects.get()
+        Route.objects.create(
+            source=airport,
+            destination=Airport.objects.create(
+                name="Chopin", closest_big_city="Warsaw"
+            ),
+            distance=800,
+        )
+        url = reverse("airport:route-list")
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            airport.name = "Kyiv Boryspil"
+            airport.save()
+        response = self.client.get(url)
+
+        self.assertEqual(response.data["results"][0]["source"]["name"], "Kyiv Boryspil")
+
+
+class SeatsSoldTest(FlightFixtureMixin, APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@test.com", password="admin123", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        route = self.create_route()
+        airplane = self.create_airplane(rows=3, seats_in_row=2)
+        self.flights = [
+            self.create_flight(
+                route,
+                airplane,
+                departure_time=f"2025-09-18T{hour}:00:00Z",
+                arrival_time=f"2025-09-18T{hour + 1}:00:00Z",
+            )
+            for hour in (10, 12)
+        ]
+        self.order = Order.objects.create(user=self.admin)
+
+    def seats_sold(self):
+        return list(
+            Flight.objects.order_by("departure_time").values_list(
+                "seats_sold", flat=True
+            )
+        )
+
+    def test_order_counts_tickets_per_flight(self):
+        response = self.client.post(
+            reverse("airport:order-list"),
+            {
+                "tickets": [
+                    {"flight": self.flights[0].id, "row": 1, "seat": 1},
+                    {"flight": self.flights[0].id, "row": 1, "seat": 2},
+                    {"flight": self.flights[1].id, "row": 1, "seat": 1},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.seats_sold(), [2, 1])
+
+    def test_ticket_update_and_delete_move_counts(self):
+        ticket = Ticket.objects.create(
+            flight=self.flights[0], order=self.order, row=1, seat=1
+        )
+        self.assertEqual(self.seats_sold(), [1, 0])
+
+        ticket = Ticket.objects.get(id=ticket.id)
+        ticket.flight = self.flights[1]
+        ticket.save()
+        self.assertEqual(self.seats_sold(), [0, 1])
+
+        self.order.delete()
+        self.assertEqual(self.seats_sold(), [0, 0])
+
+    def test_deleting_order_updates_each_flight_once(self):
+        Ticket.objects.bulk_create(
+            Ticket(flight=flight, order=self.order, row=1, seat=seat)
+            for flight in self.flights
+            for seat in (1, 2, 3)
+        )
+        Flight.add_seats_sold({flight.id: 3 for flight in self.flights})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.order.delete()
+
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "airport_flight"')
+        ]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(self.seats_sold(), [0, 0])
+
+    def test_deleting_ticket_of_drifted_count_keeps_zero(self):
+        ticket = Ticket.objects.create(
+            flight=self.flights[0], order=self.order, row=1, seat=1
+        )
+        Flight.objects.filter(id=self.flights[0].id).update(seats_sold=0)
+
+        ticket.delete()
+
+        self.assertEqual(self.seats_sold(), [0, 0])
+
+    def test_saving_stale_flight_keeps_count(self):
+        stale = Flight.objects.get(id=self.flights[0].id)
+        Ticket.objects.create(flight=self.flights[0], order=self.order, row=1, seat=1)
+
+        stale.save()
+
+        self.assertEqual(self.seats_sold(), [1, 0])
+
+    def test_filter_and_order_by_seats_sold(self):
+        Ticket.objects.create(flight=self.flights[1], order=self.order, row=1, seat=1)
+
+        response = self.client.get(
+            reverse("airport:flight-list"),
+            {"ordering": "-seats_sold", "max_seats_sold": 1},
+        )
+
+        self.assertEqual(
+            [flight["id"] for flight in response.data["results"]],
+            [self.flights[1].id, self.flights[0].id],
+        )
+        self.assertEqual(response.data["results"][0]["tickets_available"], 5)
+
+    def test_reconcile_seats_sold(self):
+        Ticket.objects.create(flight=self.flights[0], order=self.order, row=1, seat=1)
+        Flight.objects.filter(id=self.flights[0].id).update(seats_sold=5)
+        Flight.objects.filter(id=self.flights[1].id).update(seats_sold=2)
+        out = StringIO()
+
+        call_command("reconcile_seats_sold", batch_size=1, stdout=out)
+
+        self.assertIn("Checked 2 flights. Fixed 2 wrong counters.", out.getvalue())
+        self.assertEqual(self.seats_sold(), [1, 0])
+
+
+class AnalyticsAPITest(FlightFixtureMixin, APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@test.com", password="admin123", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        self.to_lviv = self.create_route("Kyiv", "Lviv", 500)
+        self.to_odesa = self.create_route("Kyiv", "Odesa", 400)
+        airplane = self.create_airplane("UR-003", rows=2, seats_in_row=2)
+
+        flights = [
+            self.create_flight(
+                route,
+                airplane,
+                departure_time=f"2025-09-{day}T15:00:00Z",
+                arrival_time=f"2025-09-{day}T17:00:00Z",
+            )
+            for route, day in (
+                (self.to_lviv, 18),
+                (self.to_lviv, 19),
+                (self.to_odesa, 20),
+                (self.to_odesa, 30),
+            )
+        ]
+        for flight, seats, created_at in (
+            (flights[0], 3, "2025-08-01T15:00:00Z"),
+            (flights[1], 1, "2025-08-02T15:00:00Z"),
+            (flights[2], 3, "2025-09-01T15:00:00Z"),
+            (flights[3], 4, "2025-09-02T15:00:00Z"),
+        ):
+            order = Order.objects.create(user=self.admin)
+            Order.objects.filter(id=order.id).update(created_at=created_at)
+            for seat in range(seats):
+                Ticket.objects.create(
+                    flight=flight, order=order, row=seat // 2 + 1, seat=seat % 2 + 1
+                )
+
+    def get_report(self, name, **params):
+        return self.client.get(
+            reverse(f"airport:analytics-{name}"),
+            {"date_from": "2025-09-01", "date_to": "2025-09-20", **params},
+        )
+
+    def test_reports_require_staff(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(email="user@test.com", password="user1234")
+        )
+
+        self.assertEqual(
+            self.get_report("routes").status_code, status.HTTP_403_FORBIDDEN
+        )
+
+    def test_route_stats(self):
+        with self.assertNumQueries(1):
+            response = self.get_report("routes")
+
+        self.assertEqual(
+            [
+                (
+                    row["route"],
+                    row["flights"],
+                    row["tickets"],
+                    row["capacity"],
+                    row["passenger_km"],
+                )
+                for row in response.data
+            ],
+            [(self.to_lviv.id, 2, 4, 8, 2000), (self.to_odesa.id, 1, 3, 4, 1200)],
+        )
+        self.assertEqual(response.data[0]["load_factor"], 0.5)
+
+        response = self.get_report("routes", ordering="load_factor", limit=1)
+        self.assertEqual(
+            [(row["route"], row["load_factor"]) for row in response.data],
+            [(self.to_odesa.id, 0.75)],
+        )
+
+    def test_route_without_seats_has_no_load_factor(self):
+        route = self.create_route("Lviv", "Odesa", 600)
+        self.create_flight(
+            route,
+            self.create_airplane("UR-000", rows=0, seats_in_row=0),
+            departure_time="2025-09-18T15:00:00Z",
+            arrival_time="2025-09-18T17:00:00Z",
+        )
+
+        response = self.get_report("routes", ordering="load_factor")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (response.data[-1]["route"], response.data[-1]["load_factor"]),
+            (route.id, None),
+        )
+
+    def test_airport_stats(self):
+        with self.assertNumQueries(1):
+            response = self.get_report("airports")
+
+        self.assertEqual(
+            [
+                (
+                    row["name"],
+                    row["departing_flights"],
+                    row["arriving_flights"],
+                    row["tickets"],
+                )
+                for row in response.data
+            ],
+            [("Boryspil", 3, 0, 7), ("Danylo Halytskyi", 0, 2, 4), ("Odesa", 0, 1, 3)],
+        )
+
+    def test_sales_from_summary_and_tickets(self):
+        expected = [
+            {
+                "period": "2025-08-01",
+                "orders": 2,
+                "tickets": 4,
+                "passenger_km": 2000,
+            },
+            {
+                "period": "2025-09-01",
+                "orders": 2,
+                "tickets": 7,
+                "passenger_km": 2800,
+            },
+        ]
+        params = {"date_from": "2025-07-01", "date_to": "2025-09-30"}
+
+        self.assertEqual(self.get_report("sales", **params).data, expected)
+
+        out = StringIO()
+        call_command("refresh_sales", since=date(2025, 7, 15), stdout=out)
+        self.assertIn("Summarized", out.getvalue())
+
+        with self.assertNumQueries(2):
+            response = self.get_report("sales", **params)
+        self.assertEqual(response.data, expected)
+
+        response = self.get_report("sales", period="day", **params)
+        self.assertEqual(
+            [(row["period"], row["tickets"]) for row in response.data],
+            [
+                ("2025-08-01", 3),
+                ("2025-08-02", 1),
+                ("2025-09-01", 3),
+                ("2025-09-02", 4),
+            ],
+        )
+
+    def test_invalid_window(self):
+        response = self.get_report("sales", date_from="2025-10-01")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExportAPITest(FlightFixtureMixin, APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@test.com", password="admin123", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        self.route = self.create_route("Kyiv", "Lviv", 500)
+        airplane = self.create_airplane("UR-004", rows=2, seats_in_row=2)
+        self.flights = [
+            self.create_flight(
+                self.route,
+                airplane,
+                departure_time=f"2025-09-{day}T15:00:00Z",
+                arrival_time=f"2025-09-{day}T17:00:00Z",
+            )
+            for day in (18, 19)
+        ]
+        self.order = Order.objects.create(user=self.admin)
+        for flight in self.flights:
+            for seat in (1, 2):
+                Ticket.objects.create(flight=flight, order=self.order, row=1, seat=seat)
+
+    def export(self, name, **params):
+        response = self.client.get(reverse(f"airport:{name}-export"), params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_export_requires_staff(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(email="user@test.com", password="user1234")
+        )
+
+        response = self.client.get(reverse("airport:ticket-export"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_tickets_csv_of_one_flight(self):
+        response, content = self.export("ticket", flight=self.flights[1].id)
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="tickets.csv"', response["Content-Disposition"])
+        lines = content.splitlines()
+        self.assertEqual(
+            lines[0],
+            "id,flight,source,destination,departure_time,row,seat,order,passenger",
+        )
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(
+            all(line.split(",")[1] == str(self.flights[1].id) for line in lines[1:])
+        )
+
+    def test_flights_ndjson_by_departure_date(self):
+        response, content = self.export(
+            "flight", output="ndjson", date_from="2025-09-19", date_to="2025-09-19"
+        )
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [(row["id"], row["seats_sold"]) for row in rows],
+            [(self.flights[1].id, 2)],
+        )
+
+    def test_orders_by_route_are_not_repeated(self):
+        _, content = self.export("order", output="ndjson", route=self.route.id)
+
+        self.assertEqual(
+            [json.loads(line)["id"] for line in content.splitlines()],
+            [self.order.id],
+        )
+
+    def test_invalid_output(self):
+        response = self.client.get(reverse("airport:order-export"), {"output": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AdminPerformanceTest(FlightFixtureMixin, TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email="admin@test.com", password="admin123"
+        )
+        self.client.force_login(self.admin)
+
+        self.route = self.create_route()
+        self.airplane = self.create_airplane()
+
+    def add_flights(self, count):
+        for _ in range(count):
+            number = Flight.objects.count()
+            departure_time = datetime(2025, 9, 1, tzinfo=timezone.utc) + timedelta(
+                days=number
+            )
+            flight = self.create_flight(
+                self.route,
+                self.airplane,
+                departure_time,
+                departure_time + timedelta(hours=2),
+            )
+            flight.set_crew(
+                [Crew.objects.create(first_name=f"Pilot {number}", last_name="Doe")]
+            )
+            order = Order.objects.create(user=self.admin)
+            Ticket.objects.create(flight=flight, order=order, row=1, seat=1)
+            Ticket.objects.create(flight=flight, order=order, row=1, seat=2)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def assertConstantQueries(self, urls):
+        for url in urls:
+            self.client.get(url)
+        before = [self.count_queries(url) for url in urls]
+        self.add_flights(5)
+        self.assertEqual([self.count_queries(url) for url in urls], before)
+
+    def test_changelists_use_constant_number_of_queries(self):
+        self.add_flights(2)
+
+        self.assertConstantQueries(
+            [
+                reverse(f"admin:airport_{model}_changelist")
+                for model in ("flight", "ticket", "order", "route")
+            ]
+        )
+
+    def test_change_forms_use_constant_number_of_queries(self):
+        self.add_flights(2)
+        flight = Flight.objects.first()
+        ticket = flight.tickets.first()
+
+        self.assertConstantQueries(
+            [
+                reverse("admin:airport_flight_change", args=[flight.id]),
+                reverse("admin:airport_order_change", args=[ticket.order_id]),
+                reverse("admin:airport_ticket_change", args=[ticket.id]),
+            ]
+        )
+
+    def test_estimated_count_of_unfiltered_table(self):
+        self.add_flights(3)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE airport_ticket")
+        paginator = EstimatedCountPaginator(Ticket.objects.order_by("id"), 10)
+        paginator.min_estimate = 1
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(paginator.count, 6)
+
+        self.assertIn("reltuples", queries[0]["sql"])
+        self.assertNotIn("COUNT", queries[0]["sql"])
+
+    def test_exact_count_of_filtered_or_small_table(self):
+        self.add_flights(3)
+        flight = Flight.objects.first()
+
+        for queryset, count in (
+            (Ticket.objects.filter(flight=flight).order_by("id"), 2),
+            (Ticket.objects.order_by("id"), 6),
+        ):
+            with self.subTest(count=count):
+                self.assertEqual(EstimatedCountPaginator(queryset, 10).count, count)
+
+
+class ImportScheduleCommandTest(TestCase):
+    SCHEDULE = (
+        "source,source_city,destination,destination_city,distance,airplane,"
+        "airplane_type,rows,seats_in_row,departure_time,arrival_time,crew\n"
+        "Boryspil,Kyiv,Chopin,Warsaw,700,UR-001,Airbus A320,30,6,"
+        "2025-09-18T08:00:00Z,2025-09-18T09:30:00Z,John Doe;Jane Roe\n"
+        "Chopin,Warsaw,Boryspil,Kyiv,700,UR-001,Airbus A320,30,6,"
+        "2025-09-18T11:00:00Z,2025-09-18T12:30:00Z,John Doe\n"
+    )
+
+    def import_schedule(self, schedule=None, suffix=".csv"):
+        with tempfile.NamedTemporaryFile("w", suffix=suffix) as file:
+            file.write(self.SCHEDULE if schedule is None else schedule)
+            file.flush()
+            call_command("import_schedule", file.name, stdout=StringIO())
+
+    def test_import_schedule(self):
+        self.import_schedule()
+
+        self.assertEqual(Airport.objects.count(), 2)
+        self.assertEqual(Route.objects.count(), 2)
+        self.assertEqual(Airplane.objects.count(), 1)
+        self.assertEqual(Crew.objects.count(), 2)
+        flight = Flight.objects.get(route__source__name="Boryspil")
+        self.assertEqual(
+            sorted(str(member) for member in flight.crew.all()),
+            ["Doe John", "Roe Jane"],
+        )
+
+    def test_import_schedule_twice_updates_existing_flights(self):
+        self.import_schedule()
+        self.import_schedule()
+
+        self.assertEqual(Flight.objects.count(), 2)
+        self.assertEqual(Crew.objects.count(), 2)
+        self.assertEqual(FlightCrew.objects.count(), 3)
+
+    def test_reimport_replaces_dropped_crew(self):
+        self.import_schedule()
+        self.SCHEDULE = self.SCHEDULE.replace("John Doe;Jane Roe", "Jim Poe")
+        self.import_schedule()
+
+        flight = Flight.objects.get(route__source__name="Boryspil")
+        self.assertEqual([str(member) for member in flight.crew.all()], ["Poe Jim"])
+        self.assertEqual(FlightCrew.objects.count(), 2)
+
+    def test_import_malformed_jsonl_reports_line(self):
+        row = {
+            "source": "Boryspil",
+            "source_city": "Kyiv",
+            "destination": "Chopin",
+            "destination_city": "Warsaw",
+            "distance": 700,
+            "airplane": "UR-001",
+            "airplane_type": "Airbus A320",
+            "rows": 30,
+            "seats_in_row": 6,
+            "departure_time": "2025-09-18T08:00:00Z",
+            "arrival_time": "2025-09-18T09:30:00Z",
+        }
+
+        for line in ('{"source": "Boryspil",', "[]"):
+            with self.subTest(line=line):
+                with self.assertRaisesMessage(CommandError, "line 3"):
+                    self.import_schedule(
+                        f"{json.dumps(row)}\n\n{line}\n", suffix=".jsonl"
+                    )
+        self.assertEqual(Flight.objects.count(), 0)
+
+
+@override_settings(REQUEST_INSTRUMENTATION=True, SLOW_REQUEST_THRESHOLD_MS=0)
+class RequestInstrumentationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        histograms.reset()
+        self.admin = User.objects.create_user(
+            email="admin@test.com", password="admin123", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_server_timing_header(self):
+        with self.assertLogs("airport.instrumentation", level="WARNING"):
+            response = self.client.get(reverse("airport:airport-list"))
+
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="1 queries"')
+        self.assertIn("serializer;dur=", response["Server-Timing"])
+        timings = dict(re.findall(r"(\w+);dur=([\d.]+)", response["Server-Timing"]))
+        self.assertLessEqual(float(timings["view"]), float(timings["total"]))
+
+    def test_serializer_timing_is_removed_after_requests(self):
+        data = BaseSerializer.data
+
+        with self.assertLogs("airport.instrumentation", level="WARNING"):
+            self.client.get(reverse("airport:airport-list"))
+
+        self.assertIs(BaseSerializer.data, data)
+
+    def test_request_metrics_histograms(self):
+        with self.assertLogs("airport.instrumentation", level="WARNING"):
+            self.client.get(reverse("airport:airport-list"))
+            response = self.client.get(reverse("airport:request-metrics"))
+
+        histogram = response.data["endpoints"]["GET airport:airport-list"]
+        self.assertEqual(histogram["count"], 1)
+        self.assertEqual(sum(histogram["buckets"]), 1)
+
+    def test_instrumentation_is_off_by_default(self):
+        with self.settings(REQUEST_INSTRUMENTATION=False):
+            self.client.handler.load_middleware()
+            response = self.client.get(reverse("airport:airport-list"))
+
+        self.assertNotIn("Server-Timing", response)
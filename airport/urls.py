@@ -1,5 +1,7 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from airport import async_views
 from airport.views import (
     AirportViewSet,
     RouteViewSet,
@@ -9,6 +11,8 @@ from airport.views import (
     FlightViewSet,
     OrderViewSet,
     TicketViewSet,
+    AnalyticsViewSet,
+    RequestMetricsView,
 )
 
 router = DefaultRouter()
@@ -21,7 +25,17 @@ router.register("airplanes", AirplaneViewSet)
 router.register("flights", FlightViewSet)
 router.register("orders", OrderViewSet)
 router.register("tickets", TicketViewSet)
+router.register("analytics", AnalyticsViewSet, basename="analytics")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("metrics/", RequestMetricsView.as_view(), name="request-metrics"),
+    path("async/flights/", async_views.flight_list, name="async-flight-list"),
+    path(
+        "async/flights/<int:pk>/seat-map/",
+        async_views.flight_seat_map,
+        name="async-flight-seat-map",
+    ),
+    path("async/airports/", async_views.airport_lookup, name="async-airport-lookup"),
+] + router.urls
 
 app_name = "airport"
@@ -1,68 +1,165 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models import F, Q
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from airport import analytics
+from airport.bulk import BulkWriteMixin, bulk_schema
+from airport.cache import CachedResponseMixin
+from airport.exports import ExportMixin
+from airport.filters import FlightFilter
+from airport.holds import seat_holds
+from airport.instrumentation import histograms
+from airport.itineraries import flight_index
 from airport.models import (
     Airport,
     Crew,
     AirplaneType,
     Airplane,
     Flight,
+    FlightCrew,
     Order,
     Ticket,
     Route,
+    timespan,
+)
+from airport.pagination import (
+    CursorPagination,
+    FlightPagination,
+    OrderPagination,
 )
 from airport.permissions import IsAdminOrIfAuthenticatedReadOnly
 from airport.serializers import (
     AirportSerializer,
     RouteSerializer,
     CrewSerializer,
+    CrewAvailabilityQuerySerializer,
     AirplaneTypeSerializer,
     AirplaneSerializer,
     FlightSerializer,
+    FlightListSerializer,
+    FlightDetailSerializer,
+    FlightSeatMapSerializer,
+    SeatHoldSerializer,
+    ItinerarySearchSerializer,
+    ItinerarySerializer,
     OrderSerializer,
+    order_tickets,
     TicketSerializer,
+    RouteStatsQuerySerializer,
+    RouteStatsSerializer,
+    AnalyticsQuerySerializer,
+    AirportStatsSerializer,
+    SalesQuerySerializer,
+    SalesSerializer,
 )
 
 
-class AirportViewSet(viewsets.ModelViewSet):
+@extend_schema_view(bulk=bulk_schema(AirportSerializer))
+class AirportViewSet(BulkWriteMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (Airport,)
 
 
-class RouteViewSet(viewsets.ModelViewSet):
+@extend_schema_view(bulk=bulk_schema(RouteSerializer))
+class RouteViewSet(BulkWriteMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Route.objects.select_related("source", "destination")
     serializer_class = RouteSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (Route, Airport)
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (Crew,)
 
+    @extend_schema(
+        parameters=[CrewAvailabilityQuerySerializer],
+        responses=CrewSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def available(self, request):
+        """
+        List crew members without a flight overlapping `start` to `end`.
+
+        Busy members are found with the GiST index of the crew schedule
+        exclusion constraint.
+        """
+        query = CrewAvailabilityQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
 
-class AirplaneTypeViewSet(viewsets.ModelViewSet):
+        busy = (
+            FlightCrew.objects.alias(timespan=timespan())
+            .filter(timespan__overlap=(params["start"], params["end"]))
+            .values("crew")
+        )
+        page = self.paginate_queryset(
+            self.get_queryset().exclude(id__in=busy).order_by("id")
+        )
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+class AirplaneTypeViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (AirplaneType,)
 
 
-class AirplaneViewSet(viewsets.ModelViewSet):
+@extend_schema_view(bulk=bulk_schema(AirplaneSerializer))
+class AirplaneViewSet(BulkWriteMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Airplane.objects.select_related("airplane_type")
     serializer_class = AirplaneSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (Airplane, AirplaneType)
+
 
+def tickets_available():
+    """Count free seats from the seats_sold counter of every flight."""
+    return F("airplane__rows") * F("airplane__seats_in_row") - F("seats_sold")
 
-class FlightViewSet(viewsets.ModelViewSet):
+
+def flight_rows():
+    """Return flights as flat rows with the fields of FlightListSerializer."""
+    return Flight.objects.annotate(
+        capacity=F("airplane__rows") * F("airplane__seats_in_row"),
+        tickets_available=tickets_available(),
+    ).values(
+        "id",
+        "route",
+        "route__source__name",
+        "route__destination__name",
+        "airplane",
+        "airplane__name",
+        "capacity",
+        "seats_sold",
+        "tickets_available",
+        "departure_time",
+        "arrival_time",
+    )
+
+
+class FlightViewSet(ExportMixin, viewsets.ModelViewSet):
     queryset = Flight.objects.select_related(
         "route__source", "route__destination", "airplane__airplane_type"
     ).prefetch_related("crew")
     serializer_class = FlightSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    pagination_class = FlightPagination
     filter_backends = (
         filters.SearchFilter,
         filters.OrderingFilter,
@@ -75,9 +172,140 @@ class FlightViewSet(viewsets.ModelViewSet):
         "crew__first_name",
         "crew__last_name",
     ]
-    ordering_fields = ["departure_time", "arrival_time", "route__source__name"]
-    ordering = ["departure_time"]
-    filterset_fields = ["route", "airplane"]
+    ordering_fields = [
+        "departure_time",
+        "arrival_time",
+        "route__source__name",
+        "seats_sold",
+        "tickets_available",
+    ]
+    ordering = ["departure_time", "id"]
+    filterset_class = FlightFilter
+    export_name = "flights"
+
+    def get_queryset(self):
+        queryset = self.queryset
+
+        if self.action == "list":
+            return flight_rows()
+
+        if self.action in ("seat_map", "holds"):
+            queryset = Flight.objects.select_related("airplane")
+
+        # The min_seats_left filter and the tickets_available ordering apply
+        # to the object lookups of every action.
+        return queryset.annotate(tickets_available=tickets_available())
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return FlightListSerializer
+        if self.action == "retrieve":
+            return FlightDetailSerializer
+        if self.action == "seat_map":
+            return FlightSeatMapSerializer
+        if self.action == "holds":
+            return SeatHoldSerializer
+        return FlightSerializer
+
+    @action(detail=True, methods=["get"], url_path="seat-map")
+    def seat_map(self, request, pk=None):
+        """
+        Return the seat grid of a flight with taken seats marked as 1 and
+        seats held by checkouts as 2.
+        """
+        flight = self.get_object()
+        serializer = self.get_serializer(flight)
+        return Response(serializer.data)
+
+    @extend_schema(
+        methods=["post"],
+        responses={201: SeatHoldSerializer},
+    )
+    @extend_schema(methods=["delete"], request=None, responses={204: None})
+    @action(detail=True, methods=["post", "delete"])
+    def holds(self, request, pk=None):
+        """
+        Hold free seats for the checkout of the current user for
+        SEAT_HOLD_TTL seconds, or release all of the user's holds (DELETE).
+
+        Nobody else can order a held seat until the hold expires or the
+        holder orders it.
+        """
+        flight = self.get_object()
+        if request.method == "DELETE":
+            seat_holds.release(flight.id, request.user.id)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = self.get_serializer(data=request.data, context={"flight": flight})
+        serializer.is_valid(raise_exception=True)
+        seats = serializer.validated_data["seats"]
+
+        def sold(seats):
+            taken = Q()
+            for row, seat in seats:
+                taken |= Q(row=row, seat=seat)
+            return flight.tickets.filter(taken).exists()
+
+        expires_at = seat_holds.hold(flight.id, seats, request.user.id, sold=sold)
+        serializer = self.get_serializer(
+            {
+                "seats": [{"row": row, "seat": seat} for row, seat in seats],
+                "expires_at": datetime.fromtimestamp(expires_at, dt_timezone.utc),
+            }
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        parameters=[ItinerarySearchSerializer],
+        responses=ItinerarySerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def itineraries(self, request):
+        """
+        Find direct and connecting flights between two airports.
+
+        The first flight departs on `departure_date`, every connection
+        leaves between `min_connection` and `max_connection` minutes after
+        the previous arrival. Itineraries are ranked by arrival time, total
+        distance or number of flights.
+        """
+        search = ItinerarySearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        earliest_departure = timezone.make_aware(
+            datetime.combine(params["departure_date"], time.min)
+        )
+        itineraries = flight_index.search(
+            source_id=params["source"],
+            destination_id=params["destination"],
+            earliest_departure=earliest_departure,
+            latest_departure=earliest_departure + timedelta(days=1, microseconds=-1),
+            min_connection=timedelta(minutes=params["min_connection"]),
+            max_connection=timedelta(minutes=params["max_connection"]),
+            max_hops=params["max_hops"],
+            ordering=params["ordering"],
+            limit=params["limit"],
+        )
+
+        flights = self.queryset.in_bulk(
+            {leg.flight_id for legs in itineraries for leg in legs}
+        )
+        serializer = ItinerarySerializer(
+            [
+                {
+                    "distance": sum(leg.distance for leg in legs),
+                    "hops": len(legs),
+                    "departure_time": legs[0].departure_time,
+                    "arrival_time": legs[-1].arrival_time,
+                    "flights": [flights[leg.flight_id] for leg in legs],
+                }
+                for legs in itineraries
+                if all(leg.flight_id in flights for leg in legs)
+            ],
+            many=True,
+        )
+        return Response(serializer.data)
 
     @extend_schema(
         parameters=[
@@ -88,7 +316,7 @@ class FlightViewSet(viewsets.ModelViewSet):
             ),
             OpenApiParameter(
                 name="ordering",
-                description='Ordering by departure_time, arrival_time, or route source name. Prefix with "-" for descending order',
+                description='Ordering by departure_time, arrival_time, route source name, seats_sold or tickets_available. Prefix with "-" for descending order',
                 type=OpenApiTypes.STR,
                 enum=[
                     "departure_time",
@@ -97,6 +325,10 @@ class FlightViewSet(viewsets.ModelViewSet):
                     "-arrival_time",
                     "route__source__name",
                     "-route__source__name",
+                    "seats_sold",
+                    "-seats_sold",
+                    "tickets_available",
+                    "-tickets_available",
                 ],
             ),
             OpenApiParameter(
@@ -109,6 +341,51 @@ class FlightViewSet(viewsets.ModelViewSet):
                 description="Filter by airplane ID",
                 type=OpenApiTypes.INT,
             ),
+            OpenApiParameter(
+                name="source",
+                description="Filter by source airport ID",
+                type=OpenApiTypes.INT,
+            ),
+            OpenApiParameter(
+                name="destination",
+                description="Filter by destination airport ID",
+                type=OpenApiTypes.INT,
+            ),
+            OpenApiParameter(
+                name="source_city",
+                description="Filter by closest big city of the source airport",
+                type=OpenApiTypes.STR,
+            ),
+            OpenApiParameter(
+                name="destination_city",
+                description="Filter by closest big city of the destination airport",
+                type=OpenApiTypes.STR,
+            ),
+            OpenApiParameter(
+                name="departure_date_after",
+                description="Filter by departure date on or after (ex. ?departure_date_after=2025-09-18)",
+                type=OpenApiTypes.DATE,
+            ),
+            OpenApiParameter(
+                name="departure_date_before",
+                description="Filter by departure date on or before (ex. ?departure_date_before=2025-09-20)",
+                type=OpenApiTypes.DATE,
+            ),
+            OpenApiParameter(
+                name="min_seats_left",
+                description="Filter by minimum number of available seats",
+                type=OpenApiTypes.INT,
+            ),
+            OpenApiParameter(
+                name="min_seats_sold",
+                description="Filter by minimum number of sold seats",
+                type=OpenApiTypes.INT,
+            ),
+            OpenApiParameter(
+                name="max_seats_sold",
+                description="Filter by maximum number of sold seats",
+                type=OpenApiTypes.INT,
+            ),
         ],
     )
     def list(self, request, *args, **kwargs):
@@ -117,24 +394,122 @@ class FlightViewSet(viewsets.ModelViewSet):
 
         Supports:
         - Search by source airport name, destination airport name, airplane name, crew names.
-        - Filter by route ID and airplane ID.
-        - Ordering by departure time, arrival time, or route source name.
+        - Filter by route ID, airplane ID, source and destination airport or city,
+          departure date range and the number of available or sold seats.
+        - Ordering by departure time, arrival time, route source name, sold or
+          available seats.
         """
         return super().list(request, *args, **kwargs)
 
 
-class OrderViewSet(viewsets.ModelViewSet):
-    queryset = Order.objects.select_related("user")
+class OrderViewSet(ExportMixin, viewsets.ModelViewSet):
+    """
+    Orders of the current user, newest first, with their tickets, flight
+    times and route airports. A page takes two queries.
+    """
+
+    queryset = Order.objects.prefetch_related(order_tickets())
     serializer_class = OrderSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    pagination_class = OrderPagination
+    export_name = "orders"
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return self.queryset.none()
+        return self.queryset.filter(user=self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class TicketViewSet(viewsets.ModelViewSet):
-    queryset = Ticket.objects.select_related(
-        "flight__route", "flight__airplane", "order__user"
-    )
+class TicketViewSet(ExportMixin, viewsets.ModelViewSet):
+    """Tickets of the current user's orders."""
+
+    queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    pagination_class = CursorPagination
+    export_name = "tickets"
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return self.queryset.none()
+        return self.queryset.filter(order__user=self.request.user)
+
+
+class AnalyticsViewSet(viewsets.ViewSet):
+    """Staff reports computed by the database with one grouped query each."""
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        parameters=[RouteStatsQuerySerializer],
+        responses=RouteStatsSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def routes(self, request):
+        """
+        Rank routes by tickets, passenger-kilometres or load factor of the
+        flights departing between `date_from` and `date_to`.
+        """
+        query = RouteStatsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        rows = analytics.route_stats(
+            *analytics.window(params["date_from"], params["date_to"]),
+            params["ordering"],
+            params["limit"],
+        )
+        return Response(RouteStatsSerializer(rows, many=True).data)
+
+    @extend_schema(
+        parameters=[AnalyticsQuerySerializer],
+        responses=AirportStatsSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def airports(self, request):
+        """
+        Rank airports by the tickets of flights departing from or arriving at
+        them between `date_from` and `date_to`.
+        """
+        query = AnalyticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        rows = analytics.airport_stats(
+            *analytics.window(params["date_from"], params["date_to"]),
+            params["limit"],
+        )
+        return Response(AirportStatsSerializer(rows, many=True).data)
+
+    @extend_schema(
+        parameters=[SalesQuerySerializer],
+        responses=SalesSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def sales(self, request):
+        """
+        Count orders, tickets and passenger-kilometres sold between
+        `date_from` and `date_to` per `period`.
+
+        Days summarized by `manage.py refresh_sales` are read from the
+        summary table, later days are counted from the tickets.
+        """
+        query = SalesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        rows = analytics.sales(params["date_from"], params["date_to"], params["period"])
+        return Response(SalesSerializer(rows, many=True).data)
+
+
+class RequestMetricsView(APIView):
+    """Export per-endpoint request duration histograms of this process."""
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        return Response(histograms.export())
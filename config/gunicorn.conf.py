@@ -0,0 +1,14 @@
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+keepalive = 5
+
+# Restart workers now and then so a slow memory leak cannot grow unbounded.
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = "-"
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from user.serializers import TOKEN_CLAIMS
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Authenticate with the claims of the access token instead of a query.
+
+    The user is a User instance with only its id and the claims loaded;
+    any other field is read from the database when first accessed. Tokens
+    are only issued to active users, so a deactivated user keeps access
+    until the access token expires. Tokens without the claims fall back
+    to loading the user.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in TOKEN_CLAIMS):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        return get_user_model().from_db(
+            DEFAULT_DB_ALIAS,
+            [api_settings.USER_ID_FIELD, *TOKEN_CLAIMS, "is_active"],
+            [user_id, *(validated_token[claim] for claim in TOKEN_CLAIMS), True],
+        )
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    target_class = ClaimsJWTAuthentication
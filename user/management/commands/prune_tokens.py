@@ -0,0 +1,28 @@
+from django.core.management import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding refresh tokens and their blacklist "
+        "entries in batches. Run it periodically, e.g. daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by()
+
+        pruned = 0
+        while ids := list(
+            expired.values_list("id", flat=True)[: options["batch_size"]]
+        ):
+            OutstandingToken.objects.filter(id__in=ids).delete()
+            pruned += len(ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Pruned {pruned} expired refresh tokens.")
+        )
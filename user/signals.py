@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from user.tokens import revoked_tokens
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_revoked_token(sender, instance, created, **kwargs):
+    if created:
+        revoked_tokens.add(instance.token.jti)
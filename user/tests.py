@@ -1,7 +1,24 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.tokens import RefreshToken, revoked_tokens
 
 User = get_user_model()
 
@@ -84,3 +101,184 @@ class UserAPITests(APITestCase):
 
         self.assertEqual(page_response.status_code, status.HTTP_200_OK)
         self.assertIn("access", page_response.data)
+
+
+class ClaimsJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="staff@gmail.com", password="testcase", is_staff=True
+        )
+
+    def obtain_tokens(self):
+        return self.client.post(
+            reverse("user:token_obtain_pair"),
+            data={"email": "staff@gmail.com", "password": "testcase"},
+        ).data
+
+    def test_tokens_carry_is_staff_claim(self):
+        tokens = self.obtain_tokens()
+
+        self.assertIs(AccessToken(tokens["access"])["is_staff"], True)
+
+    def test_read_request_does_not_load_user(self):
+        tokens = self.obtain_tokens()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("airport:airport-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            [query for query in queries if "user_user" in query["sql"]],
+        )
+
+    def test_staff_claim_allows_writes(self):
+        tokens = self.obtain_tokens()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+        response = self.client.post(
+            reverse("airport:airport-list"),
+            data={"name": "Boryspil", "closest_big_city": "Kyiv"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_refresh_updates_claims(self):
+        tokens = self.obtain_tokens()
+        User.objects.filter(pk=self.user.pk).update(is_staff=False)
+
+        response = self.client.post(
+            reverse("user:token_refresh"), data={"refresh": tokens["refresh"]}
+        )
+
+        self.assertIs(AccessToken(response.data["access"])["is_staff"], False)
+
+    def test_token_without_claims_loads_user(self):
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = self.client.post(
+            reverse("airport:airport-list"),
+            data={"name": "Boryspil", "closest_big_city": "Kyiv"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_manage_endpoint_returns_full_user(self):
+        tokens = self.obtain_tokens()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+        response = self.client.patch(
+            reverse("user:manage"), data={"email": "new@gmail.com"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "new@gmail.com")
+        self.assertTrue(self.user.check_password("testcase"))
+        self.assertTrue(self.user.is_staff)
+
+
+class TokenBlacklistTests(APITestCase):
+    def setUp(self):
+        revoked_tokens.invalidate()
+        self.user = User.objects.create_user(
+            email="test@gmail.com", password="testcase"
+        )
+        self.refresh = str(RefreshToken.for_user(self.user))
+
+    def refresh_token(self, token):
+        return self.client.post(reverse("user:token_refresh"), data={"refresh": token})
+
+    def test_rotated_refresh_token_is_rejected(self):
+        response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        reused = self.refresh_token(self.refresh)
+
+        self.assertEqual(reused.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            self.refresh_token(response.data["refresh"]).status_code,
+            status.HTTP_200_OK,
+        )
+
+    def test_refresh_skips_blacklist_lookup_for_unrevoked_token(self):
+        revoked_tokens.might_contain("warm-up")
+
+        # User, outstanding token id, blacklist insert and new outstanding
+        # token, plus the savepoints of the transaction and the insert.
+        with self.assertNumQueries(8):
+            response = self.refresh_token(self.refresh)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_filter_picks_up_tokens_blacklisted_elsewhere(self):
+        token = RefreshToken(self.refresh)
+        self.assertFalse(revoked_tokens.might_contain(token["jti"]))
+
+        BlacklistedToken.objects.bulk_create(
+            [BlacklistedToken(token=OutstandingToken.objects.get(jti=token["jti"]))]
+        )
+        revoked_tokens.invalidate()
+
+        self.assertTrue(revoked_tokens.might_contain(token["jti"]))
+        self.assertEqual(
+            self.refresh_token(self.refresh).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_token_rotated_by_another_process_is_rejected(self):
+        token = RefreshToken(self.refresh)
+        self.assertFalse(revoked_tokens.might_contain(token["jti"]))
+
+        # bulk_create sends no signal, so the filter of this process stays
+        # unaware of the blacklisted token.
+        BlacklistedToken.objects.bulk_create(
+            [BlacklistedToken(token=OutstandingToken.objects.get(jti=token["jti"]))]
+        )
+
+        self.assertFalse(revoked_tokens.might_contain(token["jti"]))
+        self.assertEqual(
+            self.refresh_token(self.refresh).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+
+    @override_settings(
+        SIMPLE_JWT={**settings.SIMPLE_JWT, "BLACKLIST_AFTER_ROTATION": False}
+    )
+    def test_refresh_without_blacklisting_checks_blacklist_table(self):
+        token = RefreshToken(self.refresh)
+        BlacklistedToken.objects.bulk_create(
+            [BlacklistedToken(token=OutstandingToken.objects.get(jti=token["jti"]))]
+        )
+
+        self.assertEqual(
+            self.refresh_token(self.refresh).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_token_is_blacklisted_once(self):
+        token = RefreshToken(self.refresh)
+        token.blacklist()
+
+        with self.assertRaises(TokenError):
+            token.blacklist()
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+    def test_prune_tokens_deletes_expired_tokens(self):
+        expired = RefreshToken.for_user(self.user)
+        OutstandingToken.objects.filter(jti=expired["jti"]).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        expired.blacklist()
+        out = StringIO()
+
+        call_command("prune_tokens", batch_size=1, stdout=out)
+
+        self.assertIn("Pruned 1 expired", out.getvalue())
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)),
+            [RefreshToken(self.refresh)["jti"]],
+        )
+        self.assertFalse(BlacklistedToken.objects.exists())
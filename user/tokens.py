@@ -0,0 +1,148 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+FILTER_CAPACITY = 100_000
+FILTER_ERROR_RATE = 0.01
+
+
+class RevokedTokenFilter:
+    """
+    Bloom filter of the JTIs of blacklisted refresh tokens.
+
+    A token the filter does not contain was neither blacklisted when the
+    filter was built nor by this process since, so the blacklist table is
+    only queried for possible hits. The filter is rebuilt from the table once
+    it is older than TOKEN_BLACKLIST_FILTER_TTL seconds to pick up tokens
+    blacklisted by other processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built_at = None
+        self._bits = bytearray()
+        self._size = 0
+        self._hashes = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def _positions(self, jti):
+        digest = hashlib.blake2b(jti.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return (
+            (first + number * second) % self._size for number in range(self._hashes)
+        )
+
+    def _add(self, jti):
+        for position in self._positions(jti):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def _ensure_built(self):
+        if (
+            self._built_at is None
+            or time.monotonic() - self._built_at > settings.TOKEN_BLACKLIST_FILTER_TTL
+        ):
+            self._build()
+
+    def _build(self):
+        revoked = BlacklistedToken.objects.filter(
+            token__expires_at__gt=timezone.now()
+        ).values_list("token__jti", flat=True)
+
+        capacity = max(FILTER_CAPACITY, 2 * revoked.count())
+        self._size = math.ceil(
+            -capacity * math.log(FILTER_ERROR_RATE) / math.log(2) ** 2
+        )
+        self._hashes = round(self._size / capacity * math.log(2))
+        self._bits = bytearray((self._size + 7) // 8)
+        for jti in revoked.iterator(chunk_size=10000):
+            self._add(jti)
+
+        self._built_at = time.monotonic()
+
+    def add(self, jti):
+        with self._lock:
+            if self._built_at is not None:
+                self._add(jti)
+
+    def might_contain(self, jti):
+        with self._lock:
+            self._ensure_built()
+            return all(
+                self._bits[position >> 3] & (1 << (position & 7))
+                for position in self._positions(jti)
+            )
+
+
+revoked_tokens = RevokedTokenFilter()
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    Refresh token that checks the blacklist table only on a filter hit
+    and writes the outstanding and blacklisted rows without extra lookups.
+
+    The filter only knows the tokens this process blacklisted since it was
+    built, so refreshing relies on the table itself: either through the
+    unique blacklist row written on rotation or `check_blacklist_table()`.
+    """
+
+    def check_blacklist(self):
+        if revoked_tokens.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def check_blacklist_table(self):
+        super().check_blacklist()
+
+    def outstanding_token(self):
+        return OutstandingToken(
+            user_id=self.payload.get(api_settings.USER_ID_CLAIM),
+            jti=self.payload[api_settings.JTI_CLAIM],
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=datetime_from_epoch(self.payload["exp"]),
+        )
+
+    def outstand(self):
+        outstanding = self.outstanding_token()
+        outstanding.save(force_insert=True)
+        return outstanding
+
+    def blacklist(self):
+        outstanding = self.outstanding_token()
+        outstanding.id = (
+            OutstandingToken.objects.filter(jti=outstanding.jti)
+            .values_list("id", flat=True)
+            .first()
+        )
+        if outstanding.id is None:
+            outstanding.save()
+
+        # A token is blacklisted once, so of two concurrent rotations of the
+        # same token only the first one succeeds.
+        try:
+            with transaction.atomic():
+                BlacklistedToken.objects.bulk_create(
+                    [BlacklistedToken(token=outstanding)]
+                )
+        except IntegrityError:
+            raise TokenError(_("Token is blacklisted"))
+        revoked_tokens.add(outstanding.jti)
+        return outstanding
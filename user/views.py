@@ -1,3 +1,4 @@
+from django.contrib.auth import get_user_model
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 
@@ -13,4 +14,5 @@ class UserManageView(generics.RetrieveUpdateAPIView):
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        # Token authentication only loads the claims, read the whole user.
+        return get_user_model().objects.get(pk=self.request.user.pk)